@@ -12,12 +12,19 @@ class FaceTracker:
         """
         self._tracker.update(faces, scale=inf_scale)
         
+        tracks = self._tracker.tracks
+        if not tracks:
+            return []
+
+        # Cast every display box to int in a single vectorized pass
+        boxes = np.array([t.smoothed_bbox for t in tracks.values()]).astype(int)
+
         parsed = []
-        for tid, track in self._tracker.tracks.items():
+        for (tid, track), bbox in zip(tracks.items(), boxes):
             parsed.append({
                 "track": track,
                 "track_id": tid,
-                "bbox": track.smoothed_bbox.astype(int),
+                "bbox": bbox,
                 "raw_face": getattr(track, "raw_face", None)
             })
             
@@ -7,6 +7,7 @@ import os
 import queue
 import subprocess
 import shlex
+from functools import lru_cache
 from typing import Callable, List, Dict, Optional
 
 from core.state import cache, cache_str
@@ -23,8 +24,25 @@ from config import (
     AUTO_AUGMENT_MIN_SIM,
     AUTO_AUGMENT_TILT_DEG,
     USE_FFMPEG_CUDA,
+    CV_THREADS_PER_WORKER,
 )
 
+@lru_cache(maxsize=256)
+def _label_sprite(label: str, font_scale: float, thickness: int, color: tuple) -> np.ndarray:
+    """
+    Rasterises a label plate (background, border, text) once per distinct
+    (label, scale, thickness, colour). Identities change far less often than
+    frames, so _draw_frame just blits the cached sprite.
+    """
+    font = cv2.FONT_HERSHEY_DUPLEX
+    (tw, th), _ = cv2.getTextSize(label, font, font_scale, thickness)
+    sprite = np.empty((th + 7, tw + 1, 3), dtype=np.uint8)
+    sprite[:] = (10, 8, 5)
+    cv2.rectangle(sprite, (0, 0), (tw, th + 6), color, 1, cv2.LINE_4)
+    cv2.putText(sprite, label, (0, th + 3), font, font_scale, (255, 255, 255), thickness, cv2.LINE_4)
+    sprite.flags.writeable = False
+    return sprite
+
 class Processor:
     """
     Background Thread:
@@ -35,6 +53,7 @@ class Processor:
       5. Yields processed JPEG bytes.
     """
     def __init__(self, client_id: str, source_url: Optional[str] = None):
+        cv2.setNumThreads(CV_THREADS_PER_WORKER) # Process-wide; K workers x full pool thrashes
         self.client_id = client_id
         self.source_url = source_url
         self.running = False
@@ -50,6 +69,8 @@ class Processor:
         self._inf_lock = threading.Lock()
         
         self.latest_processed_frame: Optional[bytes] = None
+        self._last_raw: Optional[bytes] = None # Last JPEG payload pulled from Redis
+        self._decode_buf: Optional[np.ndarray] = None # Reused downscale target
         
         # Callbacks for detections (Multiple Listeners Support)
         self.listeners = set() # Set of objects with on_detection, on_stream_start, on_inactive
@@ -101,25 +122,34 @@ class Processor:
             gst.start()
             self._ffmpeg_proc_ref = gst # For stop()
         
-        # Legacy/Redis Logic Keys
-        sub_key = f"stream:{self.client_id}:sub:frame"
-        legacy_key = f"stream:{self.client_id}:frame"
+        pubsub = None
+        if not gst:
+            # Block on the server's per-frame notification instead of spinning on GET
+            pubsub = cache.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(f"stream:{self.client_id}:new")
         
         while self.running:
             frame = None
             
-            # 1. PULL FRAME
+            # 1. PULL FRAME (blocking; the timeout doubles as the inactivity tick)
             if gst:
-                # GStreamer Case (RTSP)
-                frame = gst.latest_ai_frame
-            else:
-                # Redis Case (Push-based)
-                raw_sub = cache.get(sub_key) or cache.get(legacy_key)
-                if raw_sub:
-                    frame = self._decode_frame(raw_sub)
+                # GStreamer Case (RTSP): wake on each appsink sample, never re-process one
+                frame = gst.wait_ai_frame(timeout=0.5)
+            elif (msg := pubsub.get_message(timeout=0.5)):
+                # Redis Case (Push-based): the message carries the JPEG itself
+                # (a connection is either a main or a sub stream, so this is
+                # what its frame key holds); collapse any backlog to the newest
+                while (newer := pubsub.get_message(timeout=0.0)):
+                    msg = newer
+                raw = msg["data"]
+                # Skip decode/draw/encode/ingest for a repeated payload. A bytes
+                # compare is a memcmp that bails on the first differing byte, so
+                # it is cheaper than hashing the whole buffer.
+                if raw and raw != self._last_raw:
+                    self._last_raw = raw
+                    frame = self._decode_frame(raw)
             
             if frame is None:
-                time.sleep(0.001) # Idle CPU saver
                 # Inactivity Check
                 if is_active and (time.time() - last_frame_time > 10.0):
                     is_active = False
@@ -155,9 +185,10 @@ class Processor:
             # UI Refresh rate
             should_sync_ui = (now - self._last_ui_update > 0.5)
             
+            mono = time.monotonic()
             with self._inf_lock:
                 for tid, track in list(self._tracker._tracks.items()):
-                    if track.is_stale: continue
+                    if track.stale_at(mono): continue
                     
                     # Identity Lookup
                     name, threat, meta = "Unknown", "Low", None
@@ -200,6 +231,8 @@ class Processor:
         # 6. CLEANUP
         if gst:
             gst.stop()
+        if pubsub:
+            pubsub.close()
 
     def _push_to_redis(self, frame: np.ndarray):
         """Encapsulated Redis Ingestion Logic."""
@@ -208,7 +241,7 @@ class Processor:
                 "client_id": self.client_id,
                 "frame_count": self._frame_count,
                 "timestamp": time.time(),
-                "frame": frame.copy()
+                "frame": frame # pack() serialises synchronously; no copy needed
             }
             # We use rpush for the ingestion queue
             cache.rpush("ryuk:ingest", serde.pack(packet))
@@ -281,9 +314,6 @@ class Processor:
                                     if hasattr(l, 'on_detection'):
                                         l.on_detection({'client_id': self.client_id, 'detections': [meta]})
                 
-                # Sleep to prevent tight loop
-                time.sleep(0.05)
-                
             except Exception as e:
                 print(f"DEBUG: Processor ({self.client_id}) — Result Worker Error: {e}")
                 time.sleep(1)
@@ -300,26 +330,32 @@ class Processor:
         font_scale = max(0.4, font_scale)
         text_thickness = max(1, int(base_thickness / 2))
 
+        colors = []
         for pf in faces:
-            bbox = pf["bbox"]
-            name = pf["name"]
             threat = pf["threat"]
-            
             if threat == "High":
-                main_color = (83, 83, 255)    # Terracotta/Red
+                colors.append((83, 83, 255))    # Terracotta/Red
             elif threat == "Medium":
-                main_color = (0, 140, 255)    # Tactical Orange
+                colors.append((0, 140, 255))    # Tactical Orange
             else:
-                main_color = (83, 222, 83)    # Safe Green
-            text_color = (255, 255, 255)
+                colors.append((83, 222, 83))    # Safe Green
+
+        # Bounding boxes: one polylines call per colour instead of one
+        # rectangle per face. LINE_4 for speed over LINE_AA.
+        if faces:
+            boxes = np.array([pf["bbox"][:4] for pf in faces], dtype=np.int32)
+            outlines = boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+            for color in set(colors):
+                sel = [i for i, c in enumerate(colors) if c == color]
+                cv2.polylines(frame, list(outlines[sel]), True, color, base_thickness, cv2.LINE_4)
 
-            # Draw Bounding Box - Use LINE_4 for speed over LINE_AA
-            cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), main_color, base_thickness, cv2.LINE_4)
+        for pf, main_color in zip(faces, colors):
+            bbox = pf["bbox"]
+            name = pf["name"]
             
             label = f" {name.upper()} "
-            font = cv2.FONT_HERSHEY_DUPLEX
-            
-            (tw, th), baseline = cv2.getTextSize(label, font, font_scale, text_thickness)
+            sprite = _label_sprite(label, font_scale, text_thickness, main_color)
+            th, tw = sprite.shape[0] - 7, sprite.shape[1] - 1
             
             # Position label: prefer above bbox, flip if off-screen top
             lx = bbox[0]
@@ -334,10 +370,12 @@ class Processor:
                 lx = w - tw
             lx = max(0, lx) # Floor to 0
 
-            # Draw Label Background and Text
-            cv2.rectangle(frame, (lx, ly - th - 3), (lx + tw, ly + 3), (10, 8, 5), -1)
-            cv2.rectangle(frame, (lx, ly - th - 3), (lx + tw, ly + 3), main_color, 1, cv2.LINE_4)
-            cv2.putText(frame, label, (lx, ly), font, font_scale, text_color, text_thickness, cv2.LINE_4)
+            # Blit the cached label plate, clipped to the frame
+            y0, x0 = ly - th - 3, lx
+            fy0, fx0 = max(0, y0), max(0, x0)
+            fy1, fx1 = min(h, y0 + sprite.shape[0]), min(w, x0 + sprite.shape[1])
+            if fy1 > fy0 and fx1 > fx0:
+                frame[fy0:fy1, fx0:fx1] = sprite[fy0 - y0:fy1 - y0, fx0 - x0:fx1 - x0]
 
     def _encode_frame(self, frame: np.ndarray) -> Optional[bytes]:
         from config import VIDEO_JPEG_QUALITY
@@ -361,8 +399,11 @@ class Processor:
             h, w = frame.shape[:2]
             if w > 1280 or h > 1280:
                 scale = 1280 / max(w, h)
+                nw, nh = int(w * scale), int(h * scale)
+                if self._decode_buf is None or self._decode_buf.shape[:2] != (nh, nw):
+                    self._decode_buf = np.empty((nh, nw, 3), dtype=np.uint8)
                 # Use INTER_LINEAR for better quality/speed compromise than NEAREST
-                frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_LINEAR)
+                frame = cv2.resize(frame, (nw, nh), dst=self._decode_buf, interpolation=cv2.INTER_LINEAR)
 
             # frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
             # frame = cv2.flip(frame, 1)
@@ -1,7 +1,7 @@
 import time
 import cv2
 import numpy as np
-import json
+import orjson
 import threading
 
 from PyQt6.QtCore import QThread, pyqtSignal
@@ -10,19 +10,30 @@ from PyQt6.QtGui  import QImage
 from core.state    import cache, cache_str
 from core.ai_processor import face_app
 import core.watchdog_indexer as watchdog
+from core.hw_decoder import get_nvjpeg_decoder
 from components.face_tracker import FaceTracker
 from config import (
-    INFERENCE_THROTTLE,
-    MAX_INFERENCE_SIZE,
+    VIDEO_WORKER_DETECT_EVERY,
+    MOTION_SAD_THRESHOLD,
+    MOTION_KEYFRAME_MAX_S, MIN_JPEG_BYTES, REDUCED_DECODE_MIN_SIDE,
     FACE_CACHE_TTL_S,
     ALERT_COOLDOWN_S,
     LOG_COOLDOWN_S,
     FAISS_THRESHOLD,
+    RECOGNITION_CACHE_MIN_SIM,
     AUTO_AUGMENT_MIN_SIM,
     AUTO_AUGMENT_TILT_DEG,
     FRAME_SKIP,
+    CV_THREADS_PER_WORKER,
 )
 
+_REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
 
 class VideoProcessor(QThread):
     """
@@ -39,17 +50,49 @@ class VideoProcessor(QThread):
 
     def __init__(self, client_id: str):
         super().__init__()
+        cv2.setNumThreads(CV_THREADS_PER_WORKER) # Process-wide; K workers x full pool thrashes
         self.client_id       = client_id
         self.running         = True
         self.target_size     = (640, 480)
+        self.visible         = True   # Draw/emit only while a view shows us
         
         self._frame_count    = 0
         self._last_faces:    list[dict] = []   
         self._tracker        = FaceTracker()
         
-        # Async state
+        # Async state: one persistent inference thread, woken per snapshot
         self._is_inf_running = False
         self._inf_lock       = threading.Lock()
+        self._frame_evt      = threading.Event()
+        self._inf_thread: threading.Thread | None = None
+
+        # Persistent snapshot buffer (lazily sized). Only one inference runs at
+        # a time, so it is never written while the worker reads it.
+        self._cap_buf: np.ndarray | None = None
+
+        # Emit buffers: BGR888 QImages wrap these flat byte stores directly (no
+        # .copy(), no colour conversion). The queued frame_ready copy of a
+        # QImage shares the store's memory, so the ring of three assumes fewer
+        # than three frames are pending in the GUI thread's queue at once.
+        # Stores only ever grow. An outgrown one is parked in _emit_retired
+        # (with the emit count at retirement) instead of being freed while a
+        # queued QImage may still point at it, and released once another full
+        # ring of frames has been emitted, by which point, under the same
+        # assumption, every frame that referenced it has been delivered.
+        self._emit_ring: list[np.ndarray | None] = [None] * 3
+        self._emit_retired: list[tuple[int, np.ndarray]] = []
+        self._emit_seq = 0
+        self._ring_idx = 0
+
+        # Reduced-size decode factor (1, 2, 4, 8), learned from the first frame of a session
+        self._decode_factor: int | None = None
+        # GPU decodes land here; each frame is fully consumed (drawn, emitted,
+        # or copied into _cap_buf) before the next decode overwrites it
+        self._decode_buf: np.ndarray | None = None
+
+        # Motion gate: thumbnail of the last frame sent to inference
+        self._key_thumb: np.ndarray | None = None
+        self._key_time = 0.0
 
         from core.state import global_signals
         global_signals.faiss_updated.connect(self._on_faiss_updated)
@@ -62,14 +105,21 @@ class VideoProcessor(QThread):
         if width > 0 and height > 0:
             self.target_size = (width, height)
 
+    def set_visible(self, visible: bool):
+        """Overlay drawing and QImage emission are skipped while hidden."""
+        self.visible = visible
+
     def stop(self):
         self.running = False
+        self._frame_evt.set() # Release the inference thread
         self.wait()
 
     def _on_faiss_updated(self):
         """Flush recognition cache when FAISS index is rebuilt."""
         with self._inf_lock:
             self._last_faces = []
+            for track in self._tracker._tracks.values():
+                track.id_cache = None
 
     # ------------------------------------------------------------------
     # Main loop
@@ -78,10 +128,23 @@ class VideoProcessor(QThread):
     def run(self):
         last_frame_time = 0.0
         is_active       = False
-        frame_key       = f"stream:{self.client_id}:frame"
+
+        # Block on the server's per-frame notification instead of polling
+        # the frame key; the 1s timeout doubles as the inactivity tick.
+        pubsub = cache.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(f"stream:{self.client_id}:new")
+
+        self._inf_thread = threading.Thread(target=self._inference_loop, daemon=True)
+        self._inf_thread.start()
 
         while self.running:
-            raw = cache.get(frame_key)
+            raw = None
+            msg = pubsub.get_message(timeout=1.0)
+            if msg:
+                # Collapse any backlog: only the newest frame is worth drawing
+                while (newer := pubsub.get_message(timeout=0.0)):
+                    msg = newer
+                raw = msg["data"]
 
             if raw:
                 self._frame_count = (self._frame_count + 1) % 10_000
@@ -93,12 +156,10 @@ class VideoProcessor(QThread):
 
                 # Frame-level optimization: Skip decoding/processing if not on target frame
                 if self._frame_count % FRAME_SKIP != 0:
-                    self.msleep(2) # Shorter sleep to maintain pull rate
                     continue
 
-                frame = self._decode_frame(raw)
-                if frame is None:
-                    self.msleep(5)
+                # A truncated payload is not worth a decode attempt
+                if len(raw) < MIN_JPEG_BYTES:
                     continue
 
                 last_frame_time = time.time()
@@ -109,17 +170,36 @@ class VideoProcessor(QThread):
                 with self._inf_lock:
                     self._tracker.predict()
 
+                # Grab without retrieve: if no inference slot is free and nothing
+                # is on screen, no one reads this frame's pixels; skip the decode.
+                # The throttle counts processed frames (those past FRAME_SKIP).
+                want_inference = (not self._is_inf_running
+                                  and (self._frame_count // FRAME_SKIP) % VIDEO_WORKER_DETECT_EVERY == 0)
+                if not want_inference and not self.visible:
+                    continue
+
+                frame = self._decode_frame(raw)
+                if frame is None:
+                    continue
+
                 # Trigger inference if not already running
-                if not self._is_inf_running and (self._frame_count % INFERENCE_THROTTLE == 0):
+                if want_inference and self._has_motion(frame):
                     self._is_inf_running = True
-                    t = threading.Thread(target=self._async_inf_worker, args=(frame.copy(),), daemon=True)
-                    t.start()
+                    if self._cap_buf is None or self._cap_buf.shape != frame.shape:
+                        self._cap_buf = np.empty_like(frame)
+                    np.copyto(self._cap_buf, frame)
+                    self._frame_evt.set()
+
+                # Nothing on screen: keep tracking/inference, skip all rendering
+                if not self.visible:
+                    continue
 
                 # Draw LATEST track states for real-time responsiveness
                 faces_to_draw = []
+                mono = time.monotonic()
                 with self._inf_lock:
                     for tid, track in list(self._tracker._tracks.items()):
-                        if track.is_stale: continue
+                        if track.stale_at(mono): continue
                         
                         name, threat, meta = "Unknown", "Low", None
                         if track.identity_id:
@@ -142,10 +222,38 @@ class VideoProcessor(QThread):
             else:
                 if is_active and (time.time() - last_frame_time > 1.5):
                     is_active = False
+                    self._decode_factor = None # The camera may reconnect at another resolution
                     self._tracker.clear()
                     self.stream_inactive.emit(self.client_id)
 
-            self.msleep(5) # Higher frequency loop
+        pubsub.close()
+        self._inf_thread.join(timeout=2.0)
+
+    def _has_motion(self, frame: np.ndarray) -> bool:
+        """
+        Cheap scene-change test against the last inferred keyframe: SAD of an
+        80x60 green-channel thumbnail. Static scenes still get a keyframe every
+        MOTION_KEYFRAME_MAX_S so idle tracks are refreshed before going stale.
+        """
+        # Strided green-channel view: ~16x fewer pixels for INTER_AREA to touch
+        thumb = cv2.resize(frame[::4, ::4, 1], (80, 60), interpolation=cv2.INTER_AREA)
+        now = time.monotonic()
+        if (self._key_thumb is not None and now - self._key_time < MOTION_KEYFRAME_MAX_S
+                and cv2.sumElems(cv2.absdiff(thumb, self._key_thumb))[0] < MOTION_SAD_THRESHOLD):
+            return False
+        self._key_thumb = thumb
+        self._key_time = now
+        return True
+
+    def _inference_loop(self):
+        """Persistent consumer: runs one inference per snapshot handed over by run()."""
+        while self.running:
+            if not self._frame_evt.wait(timeout=0.5):
+                continue
+            self._frame_evt.clear()
+            if not self.running:
+                break
+            self._async_inf_worker(self._cap_buf)
 
     def _async_inf_worker(self, frame: np.ndarray):
         """Worker thread for AI + DB tasks."""
@@ -166,49 +274,50 @@ class VideoProcessor(QThread):
         """
         Runs heavy InsightFace, MongoDB, and Redis tasks.
         """
-        h, w      = frame.shape[:2]
-        scale     = min(MAX_INFERENCE_SIZE / w, MAX_INFERENCE_SIZE / h)
-        inf_frame = (cv2.resize(frame,
-                               (int(w * scale), int(h * scale)),
-                               interpolation=cv2.INTER_AREA)
-                     if scale < 1.0 else frame)
-        if scale >= 1.0:
-            scale = 1.0
-
+        # The detector letterboxes into its det_size (MAX_INFERENCE_SIZE)
+        # input tensor itself and returns boxes in source coordinates, so the
+        # full frame goes in directly with no separate resize pass.
+        inf_frame = frame
         results = face_app.get(inf_frame)
-        tracked = self._tracker.update(
-            results.get("faces", []), 
-            inf_scale=scale
-        )
+        tracked = self._tracker.update(results.get("faces", []))
         parsed_faces = []
-
-        for item in tracked:
-            track    = item["track"]
-            track_id = item["track_id"]
-            raw_face = item["raw_face"]
-            
-            bbox     = track.smoothed_bbox.astype(int)
- 
+        log_aadhars: list[str] = []
+        alert_names: list[str] = []
+        if not tracked:
+            self._tracker.prune_stale()
+            return parsed_faces
+
+        # Round + clip every detector box to the frame in one batched pass
+        ih, iw = inf_frame.shape[:2]
+        raw_boxes = np.rint(np.array([item["raw_face"].bbox for item in tracked], dtype=np.float32)).astype(np.int32)
+        raw_boxes[:, 0::2] = np.clip(raw_boxes[:, 0::2], 0, iw)
+        raw_boxes[:, 1::2] = np.clip(raw_boxes[:, 1::2], 0, ih)
+        emb_norms = np.linalg.norm(np.stack([item["raw_face"].embedding for item in tracked]), axis=1)
+
+        contexts = []
+        for item, (x1, y1, x2, y2), emb_norm in zip(tracked, raw_boxes, emb_norms):
             # Calculate lighting from face crop
-            bbox_raw = raw_face.bbox.astype(int)
-            ih, iw = inf_frame.shape[:2]
-            y1, y2 = max(0, bbox_raw[1]), min(ih, bbox_raw[3])
-            x1, x2 = max(0, bbox_raw[0]), min(iw, bbox_raw[2])
-            
             brightness = 0.5
             if y2 > y1 and x2 > x1:
-                face_crop = inf_frame[y1:y2, x1:x2]
-                brightness = float(np.mean(face_crop) / 255.0)
+                # cv2.mean reads the strided crop in place (~4x np.mean)
+                b, g, r, _ = cv2.mean(inf_frame[y1:y2, x1:x2])
+                brightness = (b + g + r) / (3.0 * 255.0)
 
-            context = {
+            contexts.append({
                 "brightness": brightness,
-                "pose": getattr(raw_face, "pose", [0, 0, 0]).tolist(),
-                "norm": float(np.linalg.norm(raw_face.embedding))
-            }
+                "pose": getattr(item["raw_face"], "pose", [0, 0, 0]).tolist(),
+                "norm": float(emb_norm)
+            })
+
+        # One FAISS search for every face that still needs one
+        identities = self._recognise_batch([item["track"] for item in tracked], contexts)
 
-            # Potential slow DB/Network call
-            name, threat, meta = self._recognise(track, track_id, context=context)
+        for item, (name, threat, meta) in zip(tracked, identities):
+            track    = item["track"]
+            raw_face = item["raw_face"]
             
+            bbox     = item["bbox"] # Already int-cast by FaceTracker
+
             # PIN IDENTITY: Only if we found a valid person (with a name), lock it to this track
             if meta and meta.get("aadhar") and meta.get("aadhar") != "Unknown":
                 track.identity_id = meta["aadhar"]
@@ -219,9 +328,9 @@ class VideoProcessor(QThread):
 
             aadhr = meta.get("aadhar") if meta else None
             if aadhr:
-                self._try_log(aadhr)
+                log_aadhars.append(aadhr)
             if threat == "High":
-                self._try_alert(name)
+                alert_names.append(name)
 
             parsed_faces.append({
                 "bbox":  bbox,
@@ -230,52 +339,95 @@ class VideoProcessor(QThread):
                 "embedding": raw_face.embedding
             })
 
+        self._flush_log_and_alerts(log_aadhars, alert_names)
         self._tracker.prune_stale()
         return parsed_faces
 
-    def _recognise(self, track, track_id: int, context: dict | None = None) -> tuple[str, str, dict | None]:
-        """Return (name, threat_level, meta). Uses FAISS directly."""
-        # DETECT ONCE: If this track already has a verified identity, skip the search
-        if track.identity_id:
-            meta = watchdog.get_metadata(track.identity_id)
-            if meta:
-                return meta.get("name", "Unknown"), meta.get("threat_level", "Low"), meta
-
-        emb = track.avg_embedding
- 
-        identity = watchdog.recognize_face(emb, threshold=FAISS_THRESHOLD, context=context)
-        if identity:
-            self.person_identified.emit(identity)
-            return identity.get("name", "Unknown"), identity.get("threat_level", "Low"), identity
-
-        return "Unknown", "Low", None
-
-    def _try_log(self, aadhar: str):
-        lock_key = f"log_lock:{aadhar}:{self.client_id}"
-        if not cache_str.get(lock_key):
-            watchdog.log_activity(aadhar, self.client_id)
-            cache_str.set(lock_key, "1", ex=int(LOG_COOLDOWN_S))
-
-    def _try_alert(self, name: str):
-        lock_key = f"alert_lock:{name}:{self.client_id}"
-        if not cache_str.get(lock_key):
-            msg = json.dumps({
+    def _recognise_batch(self, tracks: list, contexts: list[dict]) -> list[tuple[str, str, dict | None]]:
+        """Return (name, threat_level, meta) per track. Uses FAISS directly, one search per frame."""
+        # A pinned track's identity is reused for as long as the index is
+        # unchanged; id_cache records the version it was read at
+        version = watchdog.get_index_version()
+        results: list[tuple[str, str, dict | None]] = [("Unknown", "Low", None)] * len(tracks)
+        pending: list[int] = []
+
+        for i, track in enumerate(tracks):
+            # DETECT ONCE: If this track already has a verified identity, skip the search
+            if track.identity_id:
+                cached = track.id_cache
+                if track.pinned_identity is None or not (cached and cached[0] == version):
+                    # Index changed (profile edit / delete): re-read the pin once
+                    track.pinned_identity = watchdog.get_metadata(track.identity_id)
+                    track.id_cache = (version, track.pinned_identity) if track.pinned_identity else None
+                meta = track.pinned_identity
+                if meta:
+                    results[i] = (meta.get("name", "Unknown"), meta.get("threat_level", "Low"), meta)
+                    continue
+                track.identity_id = None # Profile deleted: release the pin and search again
+
+            # Same embedding already missed against this index -> still unknown
+            if track.recognition_cached(version, RECOGNITION_CACHE_MIN_SIM):
+                continue
+            pending.append(i)
+
+        if not pending:
+            return results
+
+        identities = watchdog.recognize_faces(
+            np.stack([tracks[i].avg_embedding for i in pending]),
+            threshold=FAISS_THRESHOLD, contexts=[contexts[i] for i in pending])
+        for i, identity in zip(pending, identities):
+            track = tracks[i]
+            if identity:
+                track.id_cache = (version, identity)
+                track.pinned_identity = identity
+                self.person_identified.emit(identity)
+                results[i] = (identity.get("name", "Unknown"), identity.get("threat_level", "Low"), identity)
+            else:
+                track.mark_unrecognised(version)
+        return results
+
+    def _flush_log_and_alerts(self, log_aadhars: list[str], alert_names: list[str]):
+        """
+        Cooldown-gated activity logs and alerts for one inference tick.
+        Every lock is taken with SET NX EX in one pipeline (atomic check and
+        set), then any alert publishes go out in a second.
+        """
+        log_aadhars = list(dict.fromkeys(log_aadhars))
+        alert_names = list(dict.fromkeys(alert_names))
+        if not log_aadhars and not alert_names:
+            return
+
+        pipe = cache_str.pipeline(transaction=False)
+        for a in log_aadhars:
+            pipe.set(f"log_lock:{a}:{self.client_id}", "1", ex=int(LOG_COOLDOWN_S), nx=True)
+        for n in alert_names:
+            pipe.set(f"alert_lock:{n}:{self.client_id}", "1", ex=int(ALERT_COOLDOWN_S), nx=True)
+        acquired = pipe.execute()
+        log_ok, alert_ok = acquired[:len(log_aadhars)], acquired[len(log_aadhars):]
+
+        for aadhar, ok in zip(log_aadhars, log_ok):
+            if ok:
+                watchdog.log_activity(aadhar, self.client_id)
+
+        pipe = cache.pipeline(transaction=False)
+        for name, ok in zip(alert_names, alert_ok):
+            if not ok: continue
+            pipe.publish("security_alerts", orjson.dumps({
                 "type":      "SECURITY_ALERT",
                 "message":   f"High Security Alert: {name} spotted at {self.client_id}",
                 "name":      name,
                 "source":    self.client_id,
                 "timestamp": time.time(),
-            })
-            cache.publish("security_alerts", msg)
-            cache_str.set(lock_key, "1", ex=int(ALERT_COOLDOWN_S))
+            }))
+        if len(pipe):
+            pipe.execute()
 
     def _try_auto_augment(self, aadhar: str, face_obj):
         pose = face_obj.pose # [yaw, pitch, roll]
         if any(abs(angle) > AUTO_AUGMENT_TILT_DEG for angle in pose):
-            lock_key = f"aug_lock:{aadhar}"
-            if not cache_str.get(lock_key):
+            if cache_str.set(f"aug_lock:{aadhar}", "1", ex=3600, nx=True):
                 watchdog.augment_identity(aadhar, face_obj.embedding)
-                cache_str.set(lock_key, "1", ex=3600)
 
     # ------------------------------------------------------------------
     # Drawing & Transcoding
@@ -329,19 +481,60 @@ class VideoProcessor(QThread):
         tw, th      = self.target_size
         scale       = min(tw / w, th / h)
         nw, nh      = int(w * scale), int(h * scale)
-        out = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_AREA) \
-              if nw > 0 and nh > 0 else frame
-        rgb = cv2.cvtColor(out, cv2.COLOR_BGR2RGB)
-        sh, sw, sc  = rgb.shape
-        qt_img = QImage(rgb.data, sw, sh, sc * sw, QImage.Format.Format_RGB888)
-        self.frame_ready.emit(qt_img.copy())
-
-    @staticmethod
-    def _decode_frame(raw: bytes) -> np.ndarray | None:
+        resize = not (nw <= 0 or nh <= 0 or (nw, nh) == (w, h))
+        if not resize:
+            nw, nh = w, h
+
+        self._emit_seq += 1
+        if self._emit_retired:
+            self._emit_retired = [(seq, s) for seq, s in self._emit_retired
+                                  if self._emit_seq - seq <= len(self._emit_ring)]
+        self._ring_idx = (self._ring_idx + 1) % len(self._emit_ring)
+        need  = nh * nw * 3
+        store = self._emit_ring[self._ring_idx]
+        if store is None or store.size < need:
+            # Geometric growth keeps the number of parked stores logarithmic
+            size = need
+            if store is not None:
+                self._emit_retired.append((self._emit_seq, store))
+                size = max(need, 2 * store.size)
+            store = self._emit_ring[self._ring_idx] = np.empty(size, dtype=np.uint8)
+        bgr = store[:need].reshape(nh, nw, 3)
+        # Qt reads BGR directly, so this single pass is the only one per frame
+        if resize:
+            cv2.resize(frame, (nw, nh), dst=bgr, interpolation=cv2.INTER_AREA)
+        else:
+            np.copyto(bgr, frame)
+        qt_img = QImage(bgr.data, nw, nh, 3 * nw, QImage.Format.Format_BGR888)
+        self.frame_ready.emit(qt_img)
+
+    def _decode_frame(self, raw: bytes) -> np.ndarray | None:
+        """
+        Decodes on the GPU with nvJPEG when available (no libjpeg pass on this
+        thread), else with libjpeg. Either way the frame is reduced while the
+        long side stays >= REDUCED_DECODE_MIN_SIDE. The detector letterboxes
+        to MAX_INFERENCE_SIZE anyway, and tracking, drawing and inference all
+        share the reduced frame, so nothing needs remapping.
+        """
         try:
-            arr   = np.frombuffer(raw, np.uint8)
-            frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+            factor = self._decode_factor or 1
+            nvjpeg = get_nvjpeg_decoder()
+            frame = nvjpeg.decode(raw, factor, out=self._decode_buf) if nvjpeg else None
+            if frame is not None:
+                self._decode_buf = frame
+            else:
+                frame = cv2.imdecode(np.frombuffer(raw, np.uint8), _REDUCED_DECODE_FLAGS[factor])
             if frame is None: return None
+            if self._decode_factor is None:
+                # First frame: learn the source size, then match later decodes
+                h, w = frame.shape[:2]
+                factor = 1
+                while factor < 8 and max(h, w) // (factor * 2) >= REDUCED_DECODE_MIN_SIDE:
+                    factor *= 2
+                self._decode_factor = factor
+                if factor > 1:
+                    # libjpeg rounds scaled dimensions up
+                    frame = cv2.resize(frame, (-(-w // factor), -(-h // factor)), interpolation=cv2.INTER_AREA)
             # frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
             # frame = cv2.flip(frame, 1)
             return frame
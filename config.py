@@ -15,6 +15,8 @@ REDIS_MAX_CONNECTIONS = 20
 
 MONGO_URI  = "mongodb://localhost:27017"
 DB_NAME    = "ryuk_ai"
+MONGO_MAX_POOL_SIZE = 50
+MONGO_COMPRESSORS   = "zstd,zlib" # Negotiated with the server; zstd needs `backports.zstd` (pymongo >= 4.14, Python < 3.14) or `zstandard` (older pymongo), zlib is the fallback
 
 # ---------------------------------------------------------------------------
 # Paths
@@ -27,6 +29,8 @@ LOG_FILE  = os.path.join(BASE_DIR, "main.log")
 DATA_DIR       = os.path.join(BASE_DIR, "data")
 MODELS_DIR     = os.path.join(DATA_DIR, "models")
 TRT_CACHE_DIR  = os.path.join(DATA_DIR, "trt_cache")
+TRT_INT8_CACHE_DIR = os.path.join(TRT_CACHE_DIR, "int8")   # Recognition INT8 engines + calibration table
+TRT_INT8_CALIB_TABLE = "arcface_int8.cache"                # Built by scripts/build_int8_calibration.py
 IDENTITIES_PKL = os.path.join(DATA_DIR, "identities.pkl")
 
 
@@ -39,6 +43,14 @@ ADAPTIVE_THRESHOLD_ENABLED = True
 ADAPTIVE_MIN_THRESHOLD = 0.35  # Never go below this (too sensitive)
 ADAPTIVE_MAX_THRESHOLD = 0.48  # Lowered from 0.60 for stricter matching
 SCORE_HISTORY_SIZE     = 100   # Sliding window for distribution tracking
+RECOGNITION_CACHE_MIN_SIM = 0.98 # Skip FAISS re-query if embedding barely moved since last miss
+FAISS_HNSW_M          = 32     # Graph links per node
+FAISS_HNSW_EF_CONSTRUCTION = 80  # Build-time beam width (one-off cost per rebuild)
+FAISS_HNSW_EF_SEARCH  = 64     # Query-time beam width: recall vs latency
+FAISS_EXACT_MAX_VECTORS = 2048 # Up to this many poses, search with one exact BLAS matmul instead of HNSW
+FAISS_SQ8_MIN_VECTORS = 10_000 # Store HNSW vectors as 8-bit codes (4x smaller) from this roster size up
+FAISS_REBUILD_DEBOUNCE_S = 0.25 # Coalesce bursts of profile mutations into one background rebuild
+FAISS_TOMBSTONE_REBUILD_RATIO = 0.25 # Compact (full rebuild) once this share of vectors is deleted
 
 MAX_POSES_PER_ID      = 10     # Max reference embeddings per person
 AUTO_AUGMENT_MIN_SIM  = 0.35   # Similarity > this + tilt = auto-add to profile
@@ -51,6 +63,9 @@ FACE_TRACK_HISTORY    = 5      # Max embedding history per tracked face
 # GLOBAL AI PROCESSOR BATCHING
 AI_BATCH_SIZE = 4            # Smaller batches for lower latency
 AI_BATCH_TIMEOUT_MS = 5      # 5ms timeout balances throughput and latency
+TRT_INT8_RECOGNITION = True  # INT8 TensorRT for recognition only (detection stays FP16); needs the calibration table
+FACE_EMB_CACHE_TTL_S = 1.0   # Reuse an ArcFace embedding for a near-identical aligned chip within this window
+FACE_EMB_CACHE_MAX_DIFF = 2.0 # Mean abs grey-level diff (32x32 thumbnail) still treated as the same chip
 
 # Performance/Throttling
 INPUT_FPS        = 30        # Expected camera input FPS
@@ -58,7 +73,15 @@ PROCESSING_FPS   = 25        # Target processing/display FPS (Smoothness)
 FRAME_SKIP       = INPUT_FPS // PROCESSING_FPS
 
 INFERENCE_THROTTLE = 1       # Process every Nth frame (Detect/Embed) relative to PROCESSING_FPS
+VIDEO_WORKER_DETECT_EVERY = 3 # Qt VideoProcessor: detect every Nth processed frame; Kalman tracks carry the boxes in between
 MAX_INFERENCE_SIZE = 640     # Optimal for TensorRT/InsightFace
+MOTION_SAD_THRESHOLD = 12_000 # SAD on an 80x60 green thumbnail (~2.5 levels/px) below which inference is skipped
+MOTION_KEYFRAME_MAX_S = 1.0   # Re-run inference at least this often on static scenes (keeps tracks alive)
+MIN_JPEG_BYTES = 1024         # Smaller websocket payloads are truncated/corrupt; dropped without a decode
+EXPECTED_STREAM_WORKERS = 4   # Concurrent camera workers sharing the CPU
+CV_THREADS_PER_WORKER = max(1, (os.cpu_count() or 1) // EXPECTED_STREAM_WORKERS) # OpenCV/OpenMP pool size (avoids K*N oversubscription)
+FAISS_OMP_THREADS = CV_THREADS_PER_WORKER # FAISS OpenMP pool; batched searches split queries across it
+REDUCED_DECODE_MIN_SIDE = 960 # CPU inference decode: libjpeg 1/2,1/4,1/8 while long side stays >= this
 
 # Detection Throttling (for "Detect Once and Track")
 DETECTION_INTERVAL = 5       # Run detector every N frames. Track in between.
@@ -79,17 +102,22 @@ FACE_CACHE_TTL_S  = 15    # Cache a recognised identity for N seconds
 ALERT_COOLDOWN_S  = 10    # Don't re-publish an alert for same person/cam
 LOG_COOLDOWN_S    = 120   # Don't re-log activity for same person/cam
 CAM_LOC_TTL_S     = 3600  # Cache camera location metadata for N seconds
+CAM_LOC_LOCAL_TTL_S = 60  # In-process copy; short so edits made by other processes show up quickly
 
 # ---------------------------------------------------------------------------
 # Streaming server
 # ---------------------------------------------------------------------------
 SERVER_HOST = "0.0.0.0"
 SERVER_PORT = 8000
+SERVER_WS_MAX_SIZE = 10 * 1024 * 1024  # Largest accepted websocket frame (a 4K JPEG fits comfortably)
+SERVER_WS_PING_INTERVAL_S = 30         # Keepalive pings; the camera stream itself keeps the socket busy
 
 # ---------------------------------------------------------------------------
 # RTSP & Video Processing
 # ---------------------------------------------------------------------------
 RTSP_TRANSPORT = "tcp"  # Use TCP for more reliable delivery and lower jitter
+USE_NVJPEG = True       # Decode ingest JPEGs in-process on the GPU (torchvision nvJPEG); tried before FFmpeg/CPU
+NVJPEG_MAX_FAILURES = 10 # Consecutive nvJPEG failures before falling back to CPU decode for good
 USE_FFMPEG_CUDA = True  # Set to True to force GPU decoding via FFmpeg sub-process (NVDEC)
 USE_GSTREAMER = True    # Set to True to use GStreamer for low-latency RTSP decoding
 RTSP_LOW_LATENCY_FLAGS = [
@@ -115,3 +143,5 @@ CLEANUP_INTERVAL_MS = 1000
 HEALTH_INTERVAL_MS = 3000
 INTEL_CLEANUP_S    = 10.0  # Remove intel card if person unseen for N seconds
 INTEL_PANEL_WIDTH  = 320
+DOSSIER_FLUSH_CHARS = 128  # Coalesce streamed dossier text into sends of at least this size...
+DOSSIER_FLUSH_S     = 0.025 # ...or flush whatever is buffered after this long
@@ -1,11 +1,14 @@
 import os
-import json
+import time
+import orjson
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
 from datetime import datetime
 from core.watchdog_indexer import get_all_profiles, get_activity_report
 from core.database import cameras_col, activity_logs_col
+from core.logger import logger
+from config import DOSSIER_FLUSH_CHARS, DOSSIER_FLUSH_S
 
 load_dotenv()
 
@@ -35,46 +38,58 @@ class RyukAgent:
         """
         # Create a persistent client instance for generation
         self.client = client
+        # Validated once; reused by every dossier request
+        self._gen_config = types.GenerateContentConfig(
+            system_instruction=self.system_prompt,
+            temperature=0.2,
+            top_p=0.95,
+            max_output_tokens=2048
+        )
 
     def generate_dossier_stream(self, profile_meta: dict, logs: list, timeframe_label: str):
         """Synthesizes raw activity logs into a structured intelligence report asynchronously."""
         try:
             # -------------------------------------------------------------
             # As requested: "nothing from the watchdog whould go to the gemini only mongo db documentss no other data"
-            # Strip PyMongo ObjectId to make it JSON serializable safely.
-            # Using dict comprehension instead of deepcopy — much faster for large docs.
+            # ObjectIds are dropped server-side: profile, index metadata and
+            # activity-report queries all project {"_id": 0}.
             # -------------------------------------------------------------
-            safe_meta = {k: v for k, v in profile_meta.items() if k != '_id'}
-            safe_logs = [
-                {k: v for k, v in l.items() if k != '_id'}
-                for l in logs
-            ]
             
             # Construct the data payload using RAW MongoDB JSON exactly as stored.
-            payload = f"TARGET METADATA (RAW MONGODB RECORD):\n{json.dumps(safe_meta, indent=2, default=str)}\n\n"
-            payload += f"TIMEFRAME: {timeframe_label}\n\n"
-            payload += f"CHRONOLOGICAL MOVEMENT LOGS (RAW MONGODB RECORDS):\n"
-            
-            if not safe_logs:
-                payload += "[]\n"
-            else:
-                payload += json.dumps(safe_logs, indent=2, default=str)
+            # Compact orjson: datetimes serialise natively, anything BSON-only
+            # (ObjectId, Decimal128) falls back to str().
+            opts = orjson.OPT_SERIALIZE_NUMPY
+            payload = (
+                f"TARGET METADATA (RAW MONGODB RECORD):\n{orjson.dumps(profile_meta, default=str, option=opts).decode()}\n\n"
+                f"TIMEFRAME: {timeframe_label}\n\n"
+                f"CHRONOLOGICAL MOVEMENT LOGS (RAW MONGODB RECORDS):\n"
+                f"{orjson.dumps(logs, default=str, option=opts).decode()}\n"
+            )
             
             # Request generation
             response_stream = self.client.models.generate_content_stream(
                 model=self.model_id,
                 contents=payload,
-                config=types.GenerateContentConfig(
-                    system_instruction=self.system_prompt,
-                    temperature=0.2,
-                    top_p=0.95,
-                    max_output_tokens=2048
-                )
+                config=self._gen_config
             )
             
+            # Coalesce chunks so each UI/WebSocket send carries more text;
+            # the first chunk still goes out immediately to keep TTFT low.
+            t0 = time.perf_counter()
+            buf, buf_len, last_flush = [], 0, None
             for chunk in response_stream:
-                if chunk.text:
-                    yield chunk.text
+                if not chunk.text:
+                    continue
+                buf.append(chunk.text)
+                buf_len += len(chunk.text)
+                now = time.monotonic()
+                if last_flush is None:
+                    logger.debug(f"[AGENT] Dossier first token after {(time.perf_counter() - t0) * 1000:.0f} ms")
+                if last_flush is None or buf_len >= DOSSIER_FLUSH_CHARS or now - last_flush > DOSSIER_FLUSH_S:
+                    yield "".join(buf)
+                    buf, buf_len, last_flush = [], 0, now
+            if buf:
+                yield "".join(buf)
                     
         except Exception as e:
             import traceback
@@ -6,14 +6,18 @@ import os
 import threading
 import queue
 import time
+import cv2
 import numpy as np
 import torch
 import onnxruntime as ort
 from insightface.app import FaceAnalysis
 from insightface.app.common import Face
+from insightface.model_zoo.scrfd import distance2bbox, distance2kps
 from core.logger import logger
 from core.ai.utils import IOBindingWrapper, TorchFaceAligner, TorchPreprocessor
-from config import AI_BATCH_SIZE, AI_BATCH_TIMEOUT_MS
+from core.ai.phash import phash64_batch
+from config import (AI_BATCH_SIZE, AI_BATCH_TIMEOUT_MS, FACE_EMB_CACHE_TTL_S, FACE_EMB_CACHE_MAX_DIFF,
+                    TRT_INT8_RECOGNITION, TRT_INT8_CACHE_DIR, TRT_INT8_CALIB_TABLE)
 
 class GlobalAIProcessor:
     def __init__(self, det_size=(640, 640), use_worker=True):
@@ -25,13 +29,19 @@ class GlobalAIProcessor:
         providers = self._get_providers(_TRT_CACHE)
         self.app = FaceAnalysis(name='buffalo_sc', providers=providers, allowed_modules=['detection', 'recognition'])
         self.app.prepare(ctx_id=0, det_size=det_size)
+        self._setup_int8_recognition(providers)
 
         self._inf_lock = threading.Lock()
         self._setup_io_binding()
 
+        # Near-duplicate chip cache: phash -> (time, 32x32 grey, embedding, norm)
+        self._emb_cache: dict[int, tuple] = {}
+        self._emb_lock = threading.Lock()
+
         self.input_queue = queue.Queue(maxsize=32)
         self.aligner = TorchFaceAligner(device='cuda')
         self.preprocessor = TorchPreprocessor(target_size=self.det_size, device='cuda')
+        self._warmup()
         
         if use_worker:
             # Multi-threaded batch workers for higher throughput
@@ -47,7 +57,9 @@ class GlobalAIProcessor:
             "trt_builder_optimization_level": 5, "trt_timing_cache_enable": True,
             "trt_timing_cache_path": cache_path,
         }
-        _cuda_options = {"device_id": 0, "gpu_mem_limit": 1 * 1024 * 1024 * 1024, "arena_extend_strategy": "kSameAsRequested"}
+        # HEURISTIC: ORT's default EXHAUSTIVE cuDNN search stalls first inference for no gain on these small convs
+        _cuda_options = {"device_id": 0, "gpu_mem_limit": 1 * 1024 * 1024 * 1024, "arena_extend_strategy": "kSameAsRequested",
+                         "cudnn_conv_algo_search": "HEURISTIC"}
         
         providers = []
         if "TensorrtExecutionProvider" in self._available: providers.append(("TensorrtExecutionProvider", _trt_options))
@@ -55,22 +67,67 @@ class GlobalAIProcessor:
         providers.append("CPUExecutionProvider")
         return providers
 
+    def _setup_int8_recognition(self, providers):
+        """
+        Rebuild only the recognition session as a TensorRT INT8 engine when a
+        calibration table exists; detection keeps the shared FP16 providers.
+        """
+        rec_model = self.app.models.get('recognition')
+        calib_path = os.path.join(TRT_INT8_CACHE_DIR, TRT_INT8_CALIB_TABLE)
+        if not (TRT_INT8_RECOGNITION and rec_model and providers[0][0] == "TensorrtExecutionProvider"):
+            return
+        if not os.path.exists(calib_path):
+            logger.info(f"[INT8] No calibration table at {calib_path}; recognition stays FP16")
+            return
+        try:
+            # Separate cache dir keeps INT8 engines apart from the FP16 ones
+            int8_options = dict(providers[0][1], trt_int8_enable=True,
+                                trt_engine_cache_path=TRT_INT8_CACHE_DIR, trt_timing_cache_path=TRT_INT8_CACHE_DIR,
+                                trt_int8_calibration_table_name=TRT_INT8_CALIB_TABLE,
+                                trt_int8_use_native_calibration_table=False)
+            rec_model.session = ort.InferenceSession(
+                rec_model.model_file, providers=[("TensorrtExecutionProvider", int8_options)] + providers[1:])
+            logger.info("[INT8] Recognition running on TensorRT INT8")
+        except Exception as e:
+            logger.error(f"[INT8] Failed, keeping FP16 recognition: {e}")
+
     def _setup_io_binding(self):
-        if 'detection' in self.app.models:
+        # Bindings place inputs/outputs on the CUDA device
+        if 'detection' in self.app.models and "CUDAExecutionProvider" in self._available:
             try:
                 det_model = self.app.models['detection']
                 self.det_wrapper = IOBindingWrapper(det_model)
                 original_run = det_model.session.run
                 def fast_run(output_names, input_feed, run_options=None):
+                    # Bindings are per-thread, so the batch workers need no lock
                     if self.det_wrapper.input_name in input_feed:
-                        with self._inf_lock:
-                            return self.det_wrapper.run_optimized(input_feed[self.det_wrapper.input_name])
+                        return self.det_wrapper.run_optimized(input_feed[self.det_wrapper.input_name])
                     return original_run(output_names, input_feed, run_options)
-                # det_model.session.run = fast_run
+                det_model.session.run = fast_run
                 logger.info("[IO BINDING] Enabled for Face Detection")
             except Exception as e:
                 logger.error(f"[IO BINDING] Failed: {e}")
 
+    def _warmup(self):
+        """
+        Run detection at every batch size the workers can form, and
+        recognition likewise, before any stream connects. TRT engine
+        build/deserialisation, cuDNN algo search and kernel JIT otherwise
+        land on the first live frames and back the queue up.
+        """
+        t0 = time.perf_counter()
+        det_model = self.app.models.get('detection')
+        rec_model = self.app.models.get('recognition')
+        frame = np.zeros((self.det_size[1], self.det_size[0], 3), dtype=np.uint8)
+        chip = np.zeros((112, 112, 3), dtype=np.uint8)
+        try:
+            for n in range(1, AI_BATCH_SIZE + 1):
+                self._detect_frames(det_model, [frame] * n)
+                if rec_model: rec_model.get_feat([chip] * n)
+            logger.info(f"[AI] Warm-up done in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        except Exception as e:
+            logger.warning(f"[AI] Warm-up skipped: {e}")
+
     def get(self, frame):
         res_event = threading.Event()
         result = {"faces": [], "event": res_event}
@@ -92,7 +149,10 @@ class GlobalAIProcessor:
             try:
                 item = self.input_queue.get(timeout=1.0)
                 batch.append(item)
-                deadline = time.time() + (AI_BATCH_TIMEOUT_MS / 1000.0)
+                # A lone frame runs straight away; the batching window only
+                # opens when other frames are already waiting (i.e. under load)
+                window = AI_BATCH_TIMEOUT_MS / 1000.0 if not self.input_queue.empty() else 0.0
+                deadline = time.time() + window
                 while len(batch) < AI_BATCH_SIZE:
                     remaining = deadline - time.time()
                     if remaining <= 0: break
@@ -105,6 +165,122 @@ class GlobalAIProcessor:
                 logger.error(f"Batch worker error: {e}")
                 for _, res in batch: res["event"].set()
 
+    def _detect_frames(self, det_model, frames, max_num=100):
+        """
+        Detect faces in every frame of a batch with ONE detector run.
+        Mirrors SCRFD.detect (letterbox -> decode -> NMS) but stacks the
+        letterboxed inputs into a single (B, 3, H, W) blob. Falls back to
+        per-frame detect() when the model has a fixed batch dimension.
+        """
+        dynamic_batch = det_model.batched and not isinstance(det_model.input_shape[0], int)
+        if len(frames) == 1 or not dynamic_batch:
+            # max_num=100 to ensure we don't accidentally limit to 0
+            return [det_model.detect(frame, max_num=max_num) for frame in frames]
+
+        in_w, in_h = self.det_size
+        det_imgs, det_scales = [], []
+        for frame in frames:
+            h, w = frame.shape[:2]
+            if h / w > in_h / in_w:
+                new_h, new_w = in_h, int(in_h * w / h)
+            else:
+                new_w, new_h = in_w, int(in_w * h / w)
+            det_img = np.zeros((in_h, in_w, 3), dtype=np.uint8)
+            det_img[:new_h, :new_w] = cv2.resize(frame, (new_w, new_h))
+            det_imgs.append(det_img)
+            det_scales.append(new_h / h)
+
+        mean = det_model.input_mean
+        blob = cv2.dnn.blobFromImages(det_imgs, 1.0 / det_model.input_std, (in_w, in_h), (mean, mean, mean), swapRB=True)
+        net_outs = det_model.session.run(det_model.output_names, {det_model.input_name: blob})
+
+        fmc = det_model.fmc
+        results = []
+        for b, (frame, det_scale) in enumerate(zip(frames, det_scales)):
+            scores_list, bboxes_list, kpss_list = [], [], []
+            for idx, stride in enumerate(det_model._feat_stride_fpn):
+                scores = net_outs[idx][b]
+                bbox_preds = net_outs[idx + fmc][b] * stride
+                height, width = in_h // stride, in_w // stride
+                key = (height, width, stride)
+                centers = det_model.center_cache.get(key)
+                if centers is None:
+                    centers = np.stack(np.mgrid[:height, :width][::-1], axis=-1).astype(np.float32)
+                    centers = (centers * stride).reshape((-1, 2))
+                    if det_model._num_anchors > 1:
+                        centers = np.stack([centers] * det_model._num_anchors, axis=1).reshape((-1, 2))
+                    det_model.center_cache[key] = centers
+
+                pos = np.where(scores >= det_model.det_thresh)[0]
+                scores_list.append(scores[pos])
+                bboxes_list.append(distance2bbox(centers, bbox_preds)[pos])
+                if det_model.use_kps:
+                    kps_preds = net_outs[idx + fmc * 2][b] * stride
+                    kpss_list.append(distance2kps(centers, kps_preds).reshape((-1, 5, 2))[pos])
+
+            scores = np.vstack(scores_list)
+            order = scores.ravel().argsort()[::-1]
+            pre_det = np.hstack((np.vstack(bboxes_list) / det_scale, scores)).astype(np.float32, copy=False)[order]
+            keep = det_model.nms(pre_det)
+            kpss = (np.vstack(kpss_list) / det_scale)[order][keep] if det_model.use_kps else None
+            results.append(self._select_faces(pre_det[keep], kpss, frame.shape, max_num))
+        return results
+
+    @staticmethod
+    def _select_faces(det, kpss, frame_shape, max_num):
+        """
+        SCRFD.detect's max_num selection (metric='default'): keep the largest,
+        most central faces, so the batched path returns the same faces as the
+        single-frame one.
+        """
+        if max_num <= 0 or det.shape[0] <= max_num:
+            return det, kpss
+        area = (det[:, 2] - det[:, 0]) * (det[:, 3] - det[:, 1])
+        cy, cx = frame_shape[0] // 2, frame_shape[1] // 2
+        offset_sq = ((det[:, 0] + det[:, 2]) / 2 - cx) ** 2 + ((det[:, 1] + det[:, 3]) / 2 - cy) ** 2
+        bindex = np.argsort(area - offset_sq * 2.0)[::-1][:max_num]
+        return det[bindex], (kpss[bindex] if kpss is not None else None)
+
+    def _embed_chips(self, rec_model, chips):
+        """
+        Unit-norm ArcFace embeddings and raw norms for aligned chips. A chip
+        whose pHash and 32x32 thumbnail match one embedded within
+        FACE_EMB_CACHE_TTL_S reuses that embedding instead of re-running
+        recognition (static faces on a 30 FPS stream).
+        """
+        now = time.monotonic()
+        # One (B, 32, 32) slab for the batch; thumbnails are resized straight into it
+        greys = np.empty((len(chips), 32, 32), dtype=np.uint8)
+        for i, c in enumerate(chips):
+            cv2.resize(cv2.cvtColor(np.ascontiguousarray(c), cv2.COLOR_BGR2GRAY), (32, 32),
+                       dst=greys[i], interpolation=cv2.INTER_AREA)
+        keys = phash64_batch(greys).tolist()
+        max_l1 = FACE_EMB_CACHE_MAX_DIFF * 32 * 32
+
+        feats, norms, miss = [None] * len(chips), np.empty(len(chips), dtype=np.float32), []
+        with self._emb_lock:
+            for i, (key, grey) in enumerate(zip(keys, greys)):
+                hit = self._emb_cache.get(key)
+                if hit and now - hit[0] < FACE_EMB_CACHE_TTL_S and cv2.norm(grey, hit[1], cv2.NORM_L1) < max_l1:
+                    feats[i], norms[i] = hit[2], hit[3]
+                else:
+                    miss.append(i)
+        if not miss:
+            return feats, norms
+
+        raw = rec_model.get_feat([chips[i] for i in miss])
+        raw_norms = np.linalg.norm(raw, axis=1)
+        raw_norms = np.where(raw_norms == 0, 1.0, raw_norms)
+        embs = (raw / raw_norms[:, None]).astype(np.float32)
+
+        with self._emb_lock:
+            if len(self._emb_cache) > 1024:
+                self._emb_cache = {k: v for k, v in self._emb_cache.items() if now - v[0] < FACE_EMB_CACHE_TTL_S}
+            for j, i in enumerate(miss):
+                feats[i], norms[i] = embs[j], raw_norms[j]
+                self._emb_cache[keys[i]] = (now, greys[i], embs[j], float(raw_norms[j]))
+        return feats, norms
+
     def _process_batch(self, batch):
         # 1. Detection
         # Separate frames and keep track of original indices for mapping results
@@ -120,9 +296,7 @@ class GlobalAIProcessor:
         det_model = self.app.models.get('detection')
         all_faces = [] # Parallel to valid_frames
         
-        for frame in valid_frames:
-            # Use det_model directly for finer control, max_num=100 to ensure we don't accidentally limit to 0
-            bboxes, kpss = det_model.detect(frame, max_num=100)
+        for bboxes, kpss in self._detect_frames(det_model, valid_frames):
             faces = [Face(bbox=bboxes[j, 0:4], kps=kpss[j], det_score=bboxes[j, 4]) 
                     for j in range(len(bboxes))] if bboxes is not None else []
             all_faces.append(faces)
@@ -130,37 +304,35 @@ class GlobalAIProcessor:
         # 2. Attributes & Recognition (only for valid frames with faces)
         rec_model = self.app.models.get('recognition')
         if rec_model and any(all_faces):
-            all_chips = []
             chip_map = [] # list of (all_faces_idx, face_idx)
-            
+            face_frames = [i for i, faces in enumerate(all_faces) if faces]
+
             with torch.no_grad():
-                for i, frame in enumerate(valid_frames):
-                    faces = all_faces[i]
-                    if not faces: continue
-                    
-                    # Batched alignment for this frame's faces
-                    frame_gpu = torch.from_numpy(np.ascontiguousarray(frame).copy()).to('cuda', non_blocking=True).permute(2, 0, 1).float().unsqueeze(0)
-                    lms_gpu = torch.from_numpy(np.array([f.kps for f in faces])).to('cuda', non_blocking=True).float()
-                    chips = self.aligner.align_batched(frame_gpu, lms_gpu, torch.zeros(len(faces), dtype=torch.long, device='cuda'))
-                    chips_np = chips.permute(0, 2, 3, 1).byte().cpu().numpy()
-                    
-                    for j, chip in enumerate(chips_np):
-                        all_chips.append(chip)
+                # Pad every frame with faces into one (B, 3, H, W) tensor so a
+                # single grid_sample aligns the chips of all streams at once
+                h_max = max(valid_frames[i].shape[0] for i in face_frames)
+                w_max = max(valid_frames[i].shape[1] for i in face_frames)
+                frames_gpu = torch.zeros((len(face_frames), 3, h_max, w_max), dtype=torch.float32, device='cuda')
+                lms, frame_idx = [], []
+                for b, i in enumerate(face_frames):
+                    frame = valid_frames[i]
+                    h, w = frame.shape[:2]
+                    frames_gpu[b, :, :h, :w] = torch.from_numpy(np.ascontiguousarray(frame)).to('cuda', non_blocking=True).permute(2, 0, 1)
+                    for j, face in enumerate(all_faces[i]):
+                        lms.append(face.kps)
+                        frame_idx.append(b)
                         chip_map.append((i, j))
-            
+
+                lms_gpu = torch.from_numpy(np.asarray(lms, dtype=np.float32)).to('cuda', non_blocking=True)
+                idx_gpu = torch.tensor(frame_idx, dtype=torch.long, device='cuda')
+                chips = self.aligner.align_batched(frames_gpu, lms_gpu, idx_gpu)
+                all_chips = list(chips.permute(0, 2, 3, 1).byte().cpu().numpy())
+
             if all_chips:
-                feats = rec_model.get_feat(all_chips)
-                norms = np.linalg.norm(feats, axis=1, keepdims=True)
-                norms = np.where(norms == 0, 1.0, norms)
-                feats = (feats / norms).astype(np.float32)
-                
+                feats, norms = self._embed_chips(rec_model, all_chips)
                 for i, (f_idx, face_idx) in enumerate(chip_map):
                     all_faces[f_idx][face_idx].embedding = feats[i]
-                    # Ensure scalar conversion is safe
-                    n_val = norms[i, 0]
-                    if hasattr(n_val, 'item'):
-                        n_val = n_val.item()
-                    all_faces[f_idx][face_idx].norm = float(n_val)
+                    all_faces[f_idx][face_idx].norm = float(norms[i])
 
         # 3. Map results back to original batch items
         valid_frame_ptr = 0
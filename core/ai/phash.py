@@ -0,0 +1,24 @@
+"""
+core/ai/phash.py
+64-bit DCT perceptual hashes for aligned face chips, computed for a whole
+batch at once.
+"""
+import numpy as np
+
+# Rows 0..7 of the orthonormal 32-point DCT-II basis (same scaling as cv2.dct):
+# the 8x8 low-frequency block of a 32x32 image is D8 @ X @ D8.T.
+_N = 32
+_k = np.arange(_N)
+_DCT = np.sqrt(2.0 / _N) * np.cos(np.pi * (2 * _k[None, :] + 1) * _k[:, None] / (2 * _N))
+_DCT[0] /= np.sqrt(2.0)
+_DCT8 = np.ascontiguousarray(_DCT[:8], dtype=np.float32)
+
+def phash64_batch(greys: np.ndarray) -> np.ndarray:
+    """(B, 32, 32) grayscale slab -> (B,) uint64 hashes, two matmuls for the whole batch."""
+    low = (_DCT8 @ greys.astype(np.float32) @ _DCT8.T).reshape(len(greys), 64)
+    bits = low > np.median(low[:, 1:], axis=1, keepdims=True) # DC term excluded from the median
+    return np.packbits(bits, axis=1).view('>u8').ravel().astype(np.uint64)
+
+def phash64(gray32: np.ndarray) -> int:
+    """64-bit DCT perceptual hash of a single 32x32 grayscale image."""
+    return int(phash64_batch(gray32[None])[0])
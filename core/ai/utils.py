@@ -1,3 +1,4 @@
+import threading
 import numpy as np
 import onnxruntime as ort
 import torch
@@ -5,7 +6,12 @@ import torch.nn.functional as F
 from core.logger import logger
 
 class IOBindingWrapper:
-    """Optimized ONNX Runtime IO Binding wrapper for GPU inference."""
+    """
+    Optimized ONNX Runtime IO Binding wrapper for GPU inference.
+    Each calling thread gets its own binding and a persistent device input
+    buffer, so concurrent batch workers neither share state nor reallocate
+    the fixed det_size input on every call.
+    """
     def __init__(self, model_or_session):
         if hasattr(model_or_session, 'session'):
             self.model = model_or_session
@@ -13,15 +19,34 @@ class IOBindingWrapper:
         else:
             self.model = None
             self.session = model_or_session
-        self.io_binding = self.session.io_binding()
         self.input_name = self.session.get_inputs()[0].name
         self.output_names = [o.name for o in self.session.get_outputs()]
-        for name in self.output_names:
-            self.io_binding.bind_output(name, 'cuda', 0)
+        self._local = threading.local()
+
+    @property
+    def io_binding(self):
+        binding = getattr(self._local, "io_binding", None)
+        if binding is None:
+            binding = self._local.io_binding = self.session.io_binding()
+            self._local.input_value = None
+            for name in self.output_names:
+                binding.bind_output(name, 'cuda', 0)
+        return binding
+
+    def _bind_host_input(self, binding, blob):
+        """Upload into this thread's device buffer, reallocating only on shape change."""
+        value = self._local.input_value
+        if value is None or tuple(value.shape()) != blob.shape:
+            value = self._local.input_value = ort.OrtValue.ortvalue_from_numpy(blob, 'cuda', 0)
+            binding.bind_ortvalue_input(self.input_name, value)
+        else:
+            value.update_inplace(blob)
 
     def run_optimized(self, blob):
+        binding = self.io_binding
         if torch.is_tensor(blob):
-            self.io_binding.bind_input(
+            self._local.input_value = None
+            binding.bind_input(
                 name=self.input_name,
                 device_type='cuda',
                 device_id=0,
@@ -30,10 +55,10 @@ class IOBindingWrapper:
                 buffer_ptr=blob.data_ptr()
             )
         else:
-            self.io_binding.bind_cpu_input(self.input_name, blob)
+            self._bind_host_input(binding, np.ascontiguousarray(blob, dtype=np.float32))
         
-        self.session.run_with_iobinding(self.io_binding)
-        return self.io_binding.copy_outputs_to_cpu()
+        self.session.run_with_iobinding(binding)
+        return binding.copy_outputs_to_cpu()
 
 class TorchFaceAligner:
     """High-performance GPU-based face alignment using spatial transformers."""
@@ -3,6 +3,7 @@ core/ai_processor.py
 Legacy wrapper for the modular Global AI Processor.
 """
 from core.ai.engine import GlobalAIProcessor
+from config import MAX_INFERENCE_SIZE
 import threading
 
 # Singleton instance
@@ -13,7 +14,7 @@ def get_ai_processor():
     global _instance
     with _lock:
         if _instance is None:
-            _instance = GlobalAIProcessor()
+            _instance = GlobalAIProcessor(det_size=(MAX_INFERENCE_SIZE, MAX_INFERENCE_SIZE))
         return _instance
 
 # Export face_app for backward compatibility and services
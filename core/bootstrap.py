@@ -8,6 +8,10 @@ def bootstrap_gpu():
     If the environment changes, it re-executes the script with the new environment.
     """
     root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    # Cap OpenMP pools before numpy/ORT load (inherited by the re-exec below)
+    from config import CV_THREADS_PER_WORKER
+    os.environ.setdefault("OMP_NUM_THREADS", str(CV_THREADS_PER_WORKER))
     
     # Check if we are in a venv, otherwise locate it
     is_venv = hasattr(sys, 'real_prefix') or (sys.base_prefix != sys.prefix)
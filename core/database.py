@@ -2,12 +2,21 @@ import motor.motor_asyncio
 import pymongo
 import asyncio
 
-from config import MONGO_URI, DB_NAME
+from config import MONGO_URI, DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_COMPRESSORS
 from core.logger import logger
 from core.exceptions import DatabaseError
 
+# Shared driver settings: bounded socket pool + compressed wire protocol
+# (activity-log reads dominate the Mongo -> Python byte count).
+_CLIENT_OPTS = dict(
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    compressors=MONGO_COMPRESSORS,
+    appname="ryuk",
+    retryReads=True,
+)
+
 # Async client for FastAPI / async routes
-client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
+client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI, **_CLIENT_OPTS)
 db = client[DB_NAME]
 
 # Collection Handles
@@ -15,15 +24,26 @@ profiles_col = db["profiles"]
 cameras_col = db["cameras"]
 activity_logs_col = db["activity_logs"]
 
+# Index specs shared by the async startup hook and the sync registry client.
+# (aadhar, timestamp desc) backs activity reports; (aadhar, client_id,
+# timestamp desc) backs the per-camera "latest log" lookup on session close.
+INDEXES = {
+    "profiles": [pymongo.IndexModel("aadhar", unique=True)],
+    "cameras": [pymongo.IndexModel("client_id", unique=True)],
+    "activity_logs": [
+        pymongo.IndexModel([("aadhar", pymongo.ASCENDING), ("timestamp", pymongo.DESCENDING)]),
+        pymongo.IndexModel([("aadhar", pymongo.ASCENDING), ("client_id", pymongo.ASCENDING), ("timestamp", pymongo.DESCENDING)]),
+        pymongo.IndexModel([("client_id", pymongo.ASCENDING), ("timestamp", pymongo.DESCENDING)]),
+    ],
+}
+
 async def init_db():
     """Ensure indexes are created for performance with error trapping."""
     try:
         # Check connection
         await client.admin.command('ping')
-        await profiles_col.create_index("aadhar", unique=True)
-        await cameras_col.create_index("client_id", unique=True)
-        await activity_logs_col.create_index([("aadhar", pymongo.ASCENDING), ("timestamp", pymongo.DESCENDING)])
-        await activity_logs_col.create_index([("client_id", pymongo.ASCENDING), ("timestamp", pymongo.DESCENDING)])
+        # One createIndexes command per collection, all three in flight at once
+        await asyncio.gather(*(db[name].create_indexes(models) for name, models in INDEXES.items()))
         logger.info("MongoDB: Database and indexes initialized.")
     except Exception as e:
         logger.error(f"MongoDB: Init error (Unreachable): {e}")
@@ -44,6 +64,7 @@ def get_sync_db():
                 MONGO_URI,
                 serverSelectionTimeoutMS=2000,
                 connectTimeoutMS=2000,
+                **_CLIENT_OPTS,
             )
         _sync_client.admin.command('ping')
         return _sync_client[DB_NAME]
@@ -52,5 +73,13 @@ def get_sync_db():
         _sync_client = None  # Force reconnect on next call
         raise DatabaseError(f"MongoDB Sync Error: {e}") from e
 
+def ensure_indexes(sync_db):
+    """Sync counterpart of init_db's index step (idempotent) for processes without the async hook."""
+    try:
+        for name, models in INDEXES.items():
+            sync_db[name].create_indexes(models)
+    except Exception as e:
+        logger.error(f"MongoDB: Index creation failed: {e}")
+
 # Run init in the background event loop if one is already running,
 # or it will be called by the server startup.
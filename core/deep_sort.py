@@ -17,6 +17,22 @@ def iou(bbox1, bbox2):
     
     return intersection / union if union > 0 else 0
 
+def iou_matrix(boxes1, boxes2):
+    """Pairwise IoU between (N, 4) and (M, 4) box arrays -> (N, M)."""
+    x1 = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+    y1 = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+    x2 = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2])
+    y2 = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3])
+
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    union = area1[:, None] + area2[None, :] - intersection
+
+    out = np.zeros_like(intersection, dtype=np.float64)
+    np.divide(intersection, union, out=out, where=union > 0)
+    return out
+
 class KalmanFilter:
     """A simple 1D Kalman Filter for box coordinates [x1, y1, x2, y2]."""
     def __init__(self, bbox):
@@ -57,28 +73,37 @@ class KalmanFilter:
         self.P = (np.eye(8) - K @ self.H) @ self.P
 
 class DeepSortTrack:
-    def __init__(self, track_id, bbox, face_embedding=None, raw_face=None):
+    def __init__(self, track_id, bbox, face_embedding=None, raw_face=None, now=None):
+        if now is None: now = time.monotonic()
         self.track_id = track_id
         self.kf = KalmanFilter(bbox)
-        self.face_embedding = face_embedding
+        # Own a private float32 copy so the EMA below can be updated in place
+        # without mutating the detector's output array.
+        self.face_embedding = None if face_embedding is None else np.array(face_embedding, dtype=np.float32)
         self.raw_face = raw_face
         self.hits = 1
         self.state = 0 # 0: Tentative, 1: Confirmed, 2: Deleted
         self.identity_id = None # Pinned Aadhar ID (identifier only)
+        self.pinned_identity = None # Metadata dict of the pinned identity
+        self.id_cache = None # (index version, identity dict) of last lookup
+
+        # Last FAISS miss: (index version, embedding snapshot)
+        self._miss_version = -1
+        self._miss_embedding = None
         
         self.time_since_update = 0
         
-        # Real-time persistence
-        self.last_update_time = time.time()
-        self.last_predict_time = time.time()
+        # Real-time persistence (monotonic clock: immune to wall-clock jumps)
+        self.last_update_time = now
+        self.last_predict_time = now
         
         # For smoothing the display box
-        self.smoothed_bbox = bbox.copy().astype(float)
+        self.smoothed_bbox = np.array(bbox, dtype=float)
 
-    def predict(self):
+    def predict(self, now=None):
         predicted = self.kf.predict()
         self.time_since_update += 1
-        self.last_predict_time = time.time()
+        self.last_predict_time = time.monotonic() if now is None else now
         
         # Robust Velocity Damping: 
         # If occluded or missing detections, slowly kill the velocity components
@@ -90,12 +115,14 @@ class DeepSortTrack:
              decay = max(0.5, 0.95 ** (self.time_since_update - 1))
              self.kf.x[4:] *= decay
         
-        # Damping for display
+        # Damping for display (in place: one temporary instead of three)
         alpha = 0.8
-        self.smoothed_bbox = alpha * predicted + (1.0 - alpha) * self.smoothed_bbox
+        sb = self.smoothed_bbox
+        sb *= (1.0 - alpha)
+        sb += alpha * predicted
         return predicted
 
-    def update(self, bbox, face_embedding=None, raw_face=None):
+    def update(self, bbox, face_embedding=None, raw_face=None, now=None):
         self.kf.update(bbox)
         self.raw_face = raw_face
         
@@ -104,16 +131,19 @@ class DeepSortTrack:
         
         if face_embedding is not None:
             if self.face_embedding is None:
-                self.face_embedding = face_embedding
+                self.face_embedding = np.array(face_embedding, dtype=np.float32)
             else:
-                self.face_embedding = alpha * self.face_embedding + (1.0 - alpha) * face_embedding
-                norm = np.linalg.norm(self.face_embedding)
-                if norm > 0: self.face_embedding /= norm
+                # In-place EMA: no temporaries per update, O(D) regardless of history.
+                emb = self.face_embedding
+                emb *= alpha
+                emb += (1.0 - alpha) * np.asarray(face_embedding, dtype=np.float32)
+                norm = np.sqrt(np.dot(emb, emb))
+                if norm > 0: emb /= norm
         
         self.hits += 1
         self.time_since_update = 0
-        self.last_update_time = time.time()
-        self.smoothed_bbox = bbox.copy().astype(float)
+        self.last_update_time = time.monotonic() if now is None else now
+        self.smoothed_bbox[:] = bbox
         
         from config import TRACKER_N_INIT
         if self.state == 0 and self.hits >= TRACKER_N_INIT:
@@ -121,10 +151,14 @@ class DeepSortTrack:
 
     @property
     def is_stale(self) -> bool:
+        return self.stale_at(time.monotonic())
+
+    def stale_at(self, now: float) -> bool:
+        """Staleness against a caller-supplied monotonic timestamp (one clock read per frame)."""
         from config import FACE_MAX_INACTIVE_S, FACE_PINNED_MAX_INACTIVE_S
         # USE REAL TIME instead of frame-ticks to avoid FPS mismatch issues
         # Especially when processing (5fps) is slower than input (30fps)
-        elapsed = time.time() - self.last_update_time
+        elapsed = now - self.last_update_time
         
         # If we have a pinned identity, we allow the track to stay longer (e.g. 60s)
         # to survive long occlusions or bad angles without losing the person.
@@ -140,6 +174,24 @@ class DeepSortTrack:
     def avg_embedding(self) -> np.ndarray:
         return self.face_embedding
 
+    def recognition_cached(self, index_version: int, min_sim: float) -> bool:
+        """
+        True if the last FAISS miss was against the same index with an
+        embedding that still has cosine (dot) similarity >= min_sim.
+        Embeddings are unit-norm, so this is a single 512-d dot product.
+        """
+        if self._miss_embedding is None or self.face_embedding is None:
+            return False
+        if self._miss_version != index_version:
+            return False
+        return float(np.dot(self._miss_embedding, self.face_embedding)) >= min_sim
+
+    def mark_unrecognised(self, index_version: int):
+        """Remember the embedding that just failed to match."""
+        if self.face_embedding is None: return
+        self._miss_version = index_version
+        self._miss_embedding = self.face_embedding.copy()
+
 class DeepSortTracker:
     def __init__(self):
         from config import TRACKER_MAX_AGE, TRACKER_MATCH_THRESHOLD, TRACKER_IOU_THRESHOLD
@@ -150,13 +202,15 @@ class DeepSortTracker:
         self._next_id = 1
 
     def predict(self):
+        now = time.monotonic()
         for track in list(self.tracks.values()):
-            track.predict()
+            track.predict(now)
 
     def update(self, faces, scale=1.0):
         """
         faces: list of InsightFace Face objects (or dicts)
         """
+        now = time.monotonic() # Single clock read shared by every track this frame
         detections = []
         face_embs = []
         raw_faces_list = []
@@ -174,35 +228,38 @@ class DeepSortTracker:
 
         if not detections:
             # Just age existing tracks
-            for tid, track in list(self.tracks.items()):
-                # Delete strictly by REAL TIME staleness
-                if track.is_stale:
-                    track.state = 2
-            self.tracks = {tid: t for tid, t in self.tracks.items() if t.state != 2}
+            self._prune(self.tracks.keys(), now)
             return
 
-        detections = np.array(detections) / scale
+        # One stacked rescale for all detections; the common full-res path
+        # (scale == 1.0) skips the arithmetic entirely.
+        detections = np.asarray(detections, dtype=np.float64)
+        if scale != 1.0:
+            detections = detections * (1.0 / scale)
         
+        # Snapshot every track box once as a contiguous (T, 4) array; the
+        # spatial stages below index rows instead of re-gathering per stage.
+        track_ids = list(self.tracks.keys())
+        track_row = {tid: i for i, tid in enumerate(track_ids)}
+        all_track_boxes = np.array([self.tracks[tid].smoothed_bbox for tid in track_ids]).reshape(-1, 4)
+
         # 2. Matching by Appearance (Fused Cosine Distance)
         confirmed_ids = [tid for tid, t in self.tracks.items() if t.state == 1]
         
         matches = []
-        unmatched_tracks = list(self.tracks.keys())
+        unmatched_tracks = list(track_ids)
         unmatched_detections = list(range(len(detections)))
         
         if len(confirmed_ids) > 0 and len(detections) > 0:
-            cost_matrix = np.zeros((len(confirmed_ids), len(detections)))
-            for i, tid in enumerate(confirmed_ids):
-                track = self.tracks[tid]
-                for j in range(len(detections)):
-                    d_face_emb = face_embs[j]
-                    
-                    dist_face = 1.0 # Max distance
-                    
-                    if track.face_embedding is not None and d_face_emb is not None:
-                        dist_face = 1.0 - np.dot(track.face_embedding, d_face_emb)
-                    
-                    cost_matrix[i, j] = dist_face
+            # Max distance (1.0) wherever either side has no embedding; the
+            # rest is one (T, D) matmul over the stacked unit vectors.
+            cost_matrix = np.ones((len(confirmed_ids), len(detections)))
+            t_rows = [i for i, tid in enumerate(confirmed_ids) if self.tracks[tid].face_embedding is not None]
+            d_cols = [j for j, e in enumerate(face_embs) if e is not None]
+            if t_rows and d_cols:
+                t_embs = np.stack([self.tracks[confirmed_ids[i]].face_embedding for i in t_rows])
+                d_embs = np.stack([face_embs[j] for j in d_cols]).astype(np.float32, copy=False)
+                cost_matrix[np.ix_(t_rows, d_cols)] = 1.0 - t_embs @ d_embs.T
             
             row_ind, col_ind = linear_sum_assignment(cost_matrix)
             for r, c in zip(row_ind, col_ind):
@@ -214,16 +271,12 @@ class DeepSortTracker:
 
         # 2. Matching by IOU (for unmatched tracks and detections)
         if len(unmatched_tracks) > 0 and len(unmatched_detections) > 0:
-            iou_matrix = np.zeros((len(unmatched_tracks), len(unmatched_detections)))
-            for i, tid in enumerate(unmatched_tracks):
-                track_bbox = self.tracks[tid].smoothed_bbox
-                for j, d_idx in enumerate(unmatched_detections):
-                    det_bbox = detections[d_idx]
-                    iou_matrix[i, j] = iou(track_bbox, det_bbox)
+            rows = [track_row[tid] for tid in unmatched_tracks]
+            iou_mat = iou_matrix(all_track_boxes[rows], detections[unmatched_detections])
             
-            row_ind, col_ind = linear_sum_assignment(-iou_matrix) # maximize IOU
+            row_ind, col_ind = linear_sum_assignment(-iou_mat) # maximize IOU
             for r, c in zip(row_ind, col_ind):
-                if iou_matrix[r, c] > self.iou_threshold:
+                if iou_mat[r, c] > self.iou_threshold:
                     tid = unmatched_tracks[r]
                     det_idx = unmatched_detections[c]
                     matches.append((tid, det_idx))
@@ -237,23 +290,32 @@ class DeepSortTracker:
         # 3. Matching by Center Distance (Fallback for low FPS Fast-Movers)
         if len(unmatched_tracks) > 0 and len(unmatched_detections) > 0:
             from config import FACE_TRACK_MAX_DIST
-            
-            def bbox_center(bbox):
-                return ((bbox[0] + bbox[2]) / 2.0, (bbox[1] + bbox[3]) / 2.0)
-                
-            dist_matrix = np.zeros((len(unmatched_tracks), len(unmatched_detections)))
-            for i, tid in enumerate(unmatched_tracks):
-                track_c = bbox_center(self.tracks[tid].smoothed_bbox)
-                for j, d_idx in enumerate(unmatched_detections):
-                    det_c = bbox_center(detections[d_idx])
-                    dist_matrix[i, j] = np.sqrt((track_c[0] - det_c[0])**2 + (track_c[1] - det_c[1])**2)
-            
-            row_ind, col_ind = linear_sum_assignment(dist_matrix) # minimize Distance
-            for r, c in zip(row_ind, col_ind):
-                if dist_matrix[r, c] < FACE_TRACK_MAX_DIST:
-                    tid = unmatched_tracks[r]
-                    det_idx = unmatched_detections[c]
-                    matches.append((tid, det_idx))
+
+            # Stack centres once and build the full (T, D) matrix in a single
+            # broadcast pass. Squared distances skip the sqrt entirely.
+            track_boxes = all_track_boxes[[track_row[tid] for tid in unmatched_tracks]]
+            det_boxes = detections[unmatched_detections]
+            track_c = (track_boxes[:, 0:2] + track_boxes[:, 2:4]) * 0.5
+            det_c = (det_boxes[:, 0:2] + det_boxes[:, 2:4]) * 0.5
+            diff = track_c[:, None, :] - det_c[None, :, :]
+            dist_matrix = (diff * diff).sum(axis=2)
+            max_dist_sq = FACE_TRACK_MAX_DIST ** 2
+
+            # Only rows/cols with a partner inside the gate can ever match, so
+            # shrink the cubic assignment problem to that feasible block.
+            in_range = dist_matrix < max_dist_sq
+            rows = np.flatnonzero(in_range.any(axis=1))
+            cols = np.flatnonzero(in_range.any(axis=0))
+            if len(rows) > 0 and len(cols) > 0:
+                # Out-of-gate pairs get a sentinel cost so the solver never
+                # trades a feasible match for a cheaper-looking infeasible one.
+                sub = np.where(in_range[np.ix_(rows, cols)], dist_matrix[np.ix_(rows, cols)], max_dist_sq * 1e3)
+                row_ind, col_ind = linear_sum_assignment(sub) # minimize Distance
+                for r, c in zip(rows[row_ind], cols[col_ind]):
+                    if in_range[r, c]:
+                        tid = unmatched_tracks[r]
+                        det_idx = unmatched_detections[c]
+                        matches.append((tid, det_idx))
                     
         # Remove matched items before handling New Tracks
         matched_tids = [m[0] for m in matches]
@@ -266,7 +328,8 @@ class DeepSortTracker:
             self.tracks[tid].update(
                 detections[det_idx], 
                 face_embedding=face_embs[det_idx], 
-                raw_face=raw_faces_list[det_idx]
+                raw_face=raw_faces_list[det_idx],
+                now=now
             )
 
         # 3. Handle Unmatched Detections (New Tracks)
@@ -275,18 +338,24 @@ class DeepSortTracker:
                 self._next_id, 
                 detections[det_idx], 
                 face_embedding=face_embs[det_idx], 
-                raw_face=raw_faces_list[det_idx]
+                raw_face=raw_faces_list[det_idx],
+                now=now
             )
             self._next_id += 1
 
         # 4. Handle Unmatched Tracks (Ageing)
-        for tid in unmatched_tracks:
-            # Delete strictly by REAL TIME staleness
-            if self.tracks[tid].is_stale:
-                self.tracks[tid].state = 2 # Deleted
+        self._prune(unmatched_tracks, now)
 
-        # Cleanup Deleted Tracks
-        self.tracks = {tid: t for tid, t in self.tracks.items() if t.state != 2}
+    def _prune(self, candidate_ids, now):
+        """
+        Deletes stale tracks among candidate_ids in place. Only unmatched
+        tracks can go stale, so the dict is no longer rebuilt every frame.
+        """
+        # Delete strictly by REAL TIME staleness
+        stale = [tid for tid in candidate_ids if self.tracks[tid].stale_at(now)]
+        for tid in stale:
+            self.tracks[tid].state = 2 # Deleted
+            del self.tracks[tid]
 
     def clear(self):
         self.tracks.clear()
@@ -32,6 +32,7 @@ class GstEngine:
         
         self.latest_ui_frame = None
         self.latest_ai_frame = None
+        self._ai_frame_evt = threading.Event() # Set per appsink sample; consumers block on it
         
         self.is_running = False
         self._thread = None
@@ -207,6 +208,13 @@ class GstEngine:
                 context.stroke()
 
 
+    def wait_ai_frame(self, timeout: float):
+        """Block until the appsink delivers a new AI frame; None on timeout."""
+        if not self._ai_frame_evt.wait(timeout):
+            return None
+        self._ai_frame_evt.clear()
+        return self.latest_ai_frame
+
     def _on_new_ai_sample(self, sink):
         """Pulls raw BGR frame for AI processing."""
         sample = sink.emit("pull-sample")
@@ -225,6 +233,7 @@ class GstEngine:
                 # format is BGR (3 bytes per pixel)
                 frame = np.frombuffer(map_info.data, dtype=np.uint8).reshape((h, w, 3)).copy()
                 self.latest_ai_frame = frame
+                self._ai_frame_evt.set()
             finally:
                 buf.unmap(map_info)
                 
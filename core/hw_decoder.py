@@ -4,8 +4,11 @@ import numpy as np
 import threading
 import time
 import os
+import warnings
 from typing import Optional
 
+from core.logger import logger
+
 class HwDecoder:
     """
     Manages an FFmpeg subprocess for hardware-accelerated decoding (NVDEC).
@@ -135,3 +138,82 @@ class JpegBatchDecoder:
 
     def stop(self):
         self.decoder.stop()
+
+class NvJpegDecoder:
+    """
+    Decodes JPEGs in-process on the GPU with nvJPEG (torchvision.io.decode_jpeg).
+    No FFmpeg pipe per client and no libjpeg pass on the CPU; only the decoded
+    BGR pixels come back across PCIe.
+    """
+    def __init__(self, device: str = "cuda"):
+        import torch
+        from torchvision.io import decode_jpeg
+        self._torch = torch
+        self._decode_jpeg = decode_jpeg
+        self.device = device
+        self._lock = threading.Lock() # One process-wide instance, shared by stream threads
+        self._failures = 0            # Consecutive; reset by any successful decode
+        self.disabled = False         # Set once failures persist; callers then decode on the CPU
+        # The JPEG bytes are wrapped without a copy; decode_jpeg never writes them
+        warnings.filterwarnings("ignore", message="The given buffer is not writable", category=UserWarning)
+
+    def decode(self, jpeg_bytes: bytes, factor: int = 1, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        BGR HWC frame; factor > 1 box-downscales on the GPU so fewer bytes
+        cross PCIe. When `out` has the decoded shape the pixels are copied
+        into it and it is returned, so a caller's buffer is reused per frame.
+        """
+        torch = self._torch
+        try:
+            data = torch.frombuffer(jpeg_bytes, dtype=torch.uint8)
+            with self._lock:
+                rgb = self._decode_jpeg(data, device=self.device) # (3, H, W) RGB on device
+            if factor > 1:
+                # Same output size as libjpeg's IMREAD_REDUCED_* (rounded up)
+                rgb = torch.nn.functional.avg_pool2d(rgb[None].float(), factor, ceil_mode=True)[0].round_().byte()
+            # Channel flip + HWC layout on the GPU, one contiguous download
+            bgr = rgb.flip(0).permute(1, 2, 0).contiguous()
+            if out is not None and out.shape == tuple(bgr.shape):
+                torch.from_numpy(out).copy_(bgr)
+                frame = out
+            else:
+                frame = bgr.cpu().numpy()
+            self._failures = 0
+            return frame
+        except Exception as e:
+            self._on_failure(e)
+            return None
+
+    def _on_failure(self, e: Exception):
+        """Log the first failure of a run only; give up on the GPU once failures persist."""
+        from config import NVJPEG_MAX_FAILURES
+        with self._lock:
+            self._failures += 1
+            failures = self._failures
+            if failures >= NVJPEG_MAX_FAILURES and not self.disabled:
+                self.disabled = True
+                logger.error(f"NvJpegDecoder: {failures} consecutive failures, switching to CPU decode: {e}")
+                return
+        if failures == 1:
+            logger.warning(f"NvJpegDecoder: decode failed, using CPU for this frame: {e}")
+
+
+_nvjpeg: "NvJpegDecoder | None | bool" = None # False once it has failed to load
+_nvjpeg_lock = threading.Lock()
+
+def get_nvjpeg_decoder() -> Optional[NvJpegDecoder]:
+    """Lazy process-wide nvJPEG decoder; None when disabled or unavailable."""
+    global _nvjpeg
+    from config import USE_NVJPEG
+    if not USE_NVJPEG or _nvjpeg is False or (_nvjpeg is not None and _nvjpeg.disabled):
+        return None
+    with _nvjpeg_lock:
+        if _nvjpeg is None:
+            try:
+                _nvjpeg = NvJpegDecoder()
+                logger.info("NvJpegDecoder: GPU JPEG decode enabled")
+            except Exception as e:
+                logger.warning(f"NvJpegDecoder: unavailable, falling back to CPU decode: {e}")
+                _nvjpeg = False
+                return None
+    return _nvjpeg
@@ -1,5 +1,8 @@
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from config import LOG_LEVEL, LOG_FILE
 
 def setup_logger(name="ryuk"):
@@ -14,19 +17,28 @@ def setup_logger(name="ryuk"):
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
     )
+    handlers = []
     
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
     
     # File handler
     try:
         file_handler = logging.FileHandler(LOG_FILE)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     except Exception as e:
         print(f"Warning: Could not create log file {LOG_FILE}: {e}")
+
+    # Callers (event loop, capture threads) only enqueue records; a listener
+    # thread does the stdout/file writes and flushes.
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
         
     return logger
 
@@ -6,24 +6,38 @@ Optimized for modularity and performance.
 import os
 import cv2
 import base64
-import json
+import orjson
 import numpy as np
 import faiss
 import threading
 import time
 import pickle
+from pymongo import UpdateOne
 from datetime import datetime, timedelta
 from collections import deque
 from core.logger import logger
-from core.database import get_sync_db
+from core._fastmath import normalize_rows
+from core.database import get_sync_db, ensure_indexes
 from core.state import cache, cache_str
 from config import (
     DATA_DIR, IDENTITIES_PKL, FAISS_THRESHOLD,
-    LOG_COOLDOWN_S, CAM_LOC_TTL_S, MAX_POSES_PER_ID,
+    LOG_COOLDOWN_S, CAM_LOC_TTL_S, CAM_LOC_LOCAL_TTL_S, MAX_POSES_PER_ID,
     ADAPTIVE_THRESHOLD_ENABLED, ADAPTIVE_MIN_THRESHOLD,
-    ADAPTIVE_MAX_THRESHOLD, SCORE_HISTORY_SIZE
+    ADAPTIVE_MAX_THRESHOLD, SCORE_HISTORY_SIZE,
+    FAISS_TOMBSTONE_REBUILD_RATIO,
+    FAISS_HNSW_M, FAISS_HNSW_EF_CONSTRUCTION, FAISS_HNSW_EF_SEARCH,
+    FAISS_REBUILD_DEBOUNCE_S, FAISS_SQ8_MIN_VECTORS, FAISS_OMP_THREADS,
+    FAISS_EXACT_MAX_VECTORS
 )
 
+# Stream workers call into FAISS concurrently; size its pool like OpenCV's
+faiss.omp_set_num_threads(FAISS_OMP_THREADS)
+if "AVX2" not in faiss.get_compile_options():
+    logger.warning(f"FAISS: built without AVX2 ({faiss.get_compile_options()}); inner-product kernels run scalar/SSE.")
+
+# Profile fields carried in the search mapping (everything else lives only in Mongo)
+_META_FIELDS = ("name", "threat_level", "phone", "address", "photo_thumb")
+
 class WatchdogIndexer:
     """
     Manages the face-recognition pipeline:
@@ -35,6 +49,7 @@ class WatchdogIndexer:
 
     def __init__(self):
         self._faiss_index = None
+        self._flat_mat: np.ndarray | None = None # Unit-norm poses in index order, small rosters only
         self._faiss_mapping: list[dict] = []
         self._lock = threading.Lock()
         self._db = None
@@ -42,9 +57,20 @@ class WatchdogIndexer:
         self._cameras_col   = None
         self._activity_col  = None
         self._aadhar_to_meta: dict[str, dict] = {}
+        self._index_version = 0 # Bumped on every index mutation
+        self._tombstones = 0    # Vectors of deleted profiles still in the (append-only) HNSW graph
+        self._tomb_filter = None # (dead rows, HNSW search params, selectors) while tombstones exist
+        self._scratch = threading.local() # Per-thread FAISS result buffers for recognize_faces
+        self._rebuild_lock = threading.Lock() # Serialises full rebuilds; readers only use self._lock
+        self._dirty = threading.Event()
+        self._rebuild_log: list[tuple] | None = None # Live mutations during an in-flight rebuild
+        # In-process front for the Redis cooldown / camera-location keys
+        self._cooldown_until: dict[tuple[str, str], float] = {} # (aadhar, client_id) -> monotonic expiry
+        self._cam_cache: dict[str, tuple[float, str, dict]] = {}  # client_id -> (expiry, location, device_info)
         self._connect_db()
         self._migrate_pickle()
         self._migrate_embeddings_schema()
+        self._migrate_normalized_embeddings()
         
         # Adaptive Thresholding Distribution Tracking
         self._unknown_scores = deque(maxlen=SCORE_HISTORY_SIZE)
@@ -53,6 +79,19 @@ class WatchdogIndexer:
         self._last_stats_update  = 0
 
         self.update_index()
+        threading.Thread(target=self._rebuild_loop, daemon=True, name="faiss-rebuild").start()
+
+    def _rebuild_loop(self):
+        """Runs one rebuild per burst of mutations, off the caller's thread."""
+        while True:
+            self._dirty.wait()
+            time.sleep(FAISS_REBUILD_DEBOUNCE_S) # Let the rest of a bulk enrol land first
+            self._dirty.clear() # Before the rebuild, so later mutations schedule another
+            self.update_index()
+
+    def _mark_dirty(self):
+        """Schedule a background rebuild; returns immediately."""
+        self._dirty.set()
 
     def _connect_db(self):
         """Obtain a synchronous MongoDB handle."""
@@ -62,6 +101,8 @@ class WatchdogIndexer:
             self._profiles_col   = db["profiles"]
             self._cameras_col    = db["cameras"]
             self._activity_col   = db["activity_logs"]
+            # The Qt dashboard and stream workers never run init_db
+            ensure_indexes(db)
 
     def _migrate_pickle(self):
         """One-time migration of legacy identities.pkl → MongoDB."""
@@ -70,15 +111,19 @@ class WatchdogIndexer:
         try:
             with open(IDENTITIES_PKL, "rb") as f:
                 identities = pickle.load(f)
+            ops = []
             for item in identities:
                 if len(item) == 2: emb, aadhar = item; name, threat = "Unknown", "Low"
                 elif len(item) == 3: emb, aadhar, name = item; threat = "Low"
                 else: emb, aadhar, name, threat = item
-                self._profiles_col.update_one(
+                ops.append(UpdateOne(
                     {"aadhar": aadhar},
                     {"$set": {"name": name, "threat_level": threat, "embedding": emb.tobytes()}},
                     upsert=True,
-                )
+                ))
+            # One round trip per 1000 profiles instead of one per profile
+            for i in range(0, len(ops), 1000):
+                self._profiles_col.bulk_write(ops[i:i + 1000], ordered=False)
             os.rename(IDENTITIES_PKL, IDENTITIES_PKL + ".bak")
             logger.info(f"[MIGRATION] Complete. {len(identities)} profiles moved.")
         except Exception as e:
@@ -87,7 +132,7 @@ class WatchdogIndexer:
     def _migrate_embeddings_schema(self):
         """Convert legacy single 'embedding' field to 'embeddings' list in MongoDB."""
         if self._db is None: return
-        legacy_docs = list(self._profiles_col.find({"embedding": {"$exists": True}, "embeddings": {"$exists": False}}))
+        legacy_docs = list(self._profiles_col.find({"embedding": {"$exists": True}, "embeddings": {"$exists": False}}, {"embedding": 1}))
         if not legacy_docs: return
         logger.info(f"[MIGRATION] Found {len(legacy_docs)} legacy profiles. Converting to list schema…")
         for doc in legacy_docs:
@@ -96,57 +141,148 @@ class WatchdogIndexer:
                 {"$set": {"embeddings": [doc["embedding"]]}, "$unset": {"embedding": ""}}
             )
 
+    def _migrate_normalized_embeddings(self):
+        """One-time pass: store every pose as a unit vector (marked normalized: True)."""
+        if self._db is None: return
+        cursor = self._profiles_col.find({"normalized": {"$ne": True}}, {"embeddings": 1}).batch_size(1000)
+        ops, total = [], 0
+        for doc in cursor:
+            embs = doc.get("embeddings", [])
+            mat = normalize_rows(np.frombuffer(b"".join(embs), dtype=np.float32).reshape(-1, 512).copy())
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"embeddings": [row.tobytes() for row in mat], "normalized": True}}))
+            # One round trip per 1000 profiles, never the whole collection in memory
+            if len(ops) == 1000:
+                self._profiles_col.bulk_write(ops, ordered=False)
+                total += len(ops); ops = []
+        if ops:
+            self._profiles_col.bulk_write(ops, ordered=False)
+            total += len(ops)
+        if total: logger.info(f"[MIGRATION] Normalised embeddings for {total} profiles.")
+
     def update_index(self):
         """Rebuilds the in-memory FAISS index from MongoDB."""
+        with self._rebuild_lock:
+            self._rebuild_index()
+
+    def _rebuild_index(self):
         if self._db is None or self._profiles_col is None:
             logger.error("FAISS Error: MongoDB unreachable.")
             return
 
+        # Mutations of the live index from here to the swap are logged, then
+        # replayed onto the new index (see _replay_rebuild_log)
+        with self._lock:
+            self._rebuild_log = []
         try:
-            projection = {"aadhar": 1, "name": 1, "threat_level": 1, "phone": 1, "address": 1, "photo_thumb": 1, "embeddings": 1}
-            identities = list(self._profiles_col.find({}, projection))
+            self._build_and_swap()
+        finally:
+            with self._lock:
+                self._rebuild_log = None
+
+    def _build_and_swap(self):
+        try:
+            projection = {"_id": 0, "aadhar": 1, "name": 1, "threat_level": 1, "phone": 1, "address": 1, "photo_thumb": 1, "embeddings": 1}
+            # Large cursor batches: a rebuild is a few round trips, not one per 101 docs
+            identities = list(self._profiles_col.find({}, projection).batch_size(2048))
         except Exception as e:
             logger.error(f"FAISS: DB query error: {e}")
             return
 
         if not identities:
             with self._lock:
-                self._faiss_index, self._faiss_mapping = None, []
+                if self._rebuild_log: self._mark_dirty(); return # Enrolled meanwhile: keep live, retry
+                self._faiss_index, self._faiss_mapping, self._flat_mat = None, [], None
+                self._tombstones, self._tomb_filter = 0, None
+                self._index_version += 1
             return
 
-        embeddings, mapping = [], []
-        for doc in identities:
-            doc_embs = doc.get("embeddings", [])
-            person_meta = {
-                "aadhar": doc.get("aadhar", "Unknown"), "name": doc.get("name", "Unknown"),
-                "threat_level": doc.get("threat_level", "Low"), "phone": doc.get("phone", "N/A"),
-                "address": doc.get("address", "N/A"), "photo_thumb": doc.get("photo_thumb", ""),
-            }
-            for emb_bytes in doc_embs:
-                embeddings.append(np.frombuffer(emb_bytes, dtype="float32"))
-                mapping.append(person_meta)
-
-        if not embeddings:
+        metas = [{
+            "aadhar": doc.get("aadhar", "Unknown"), "name": doc.get("name", "Unknown"),
+            "threat_level": doc.get("threat_level", "Low"), "phone": doc.get("phone", "N/A"),
+            "address": doc.get("address", "N/A"), "photo_thumb": doc.get("photo_thumb", ""),
+        } for doc in identities]
+        mapping = [meta for doc, meta in zip(identities, metas) for _ in doc.get("embeddings", [])]
+
+        if not mapping:
             with self._lock:
-                self._faiss_index, self._faiss_mapping = None, []
+                if self._rebuild_log: self._mark_dirty(); return # Enrolled meanwhile: keep live, retry
+                self._faiss_index, self._faiss_mapping, self._flat_mat = None, [], None
+                self._tombstones, self._tomb_filter = 0, None
+                self._index_version += 1
             return
 
-        mat = np.ascontiguousarray(np.array(embeddings, dtype="float32"))
-        norms = np.linalg.norm(mat, axis=1, keepdims=True)
-        norms = np.where(norms == 0, 1.0, norms)
-        mat /= norms
-
-        cpu_idx = faiss.IndexHNSWFlat(512, 32, faiss.METRIC_INNER_PRODUCT)
+        # One join + one reinterpret instead of a frombuffer/list append per pose.
+        # Writers store unit vectors, but the in-place renormalise is one cheap
+        # pass and keeps a raw pose from any other writer from skewing scores.
+        buf = b"".join(emb for doc in identities for emb in doc.get("embeddings", []))
+        mat = normalize_rows(np.frombuffer(buf, dtype=np.float32).reshape(-1, 512).copy())
+
+        if len(mat) >= FAISS_SQ8_MIN_VECTORS:
+            # 8-bit scalar codes: 4x less memory, ~1e-3 score error on unit vectors.
+            # Smaller rosters stay float: per-dim ranges trained on a handful of
+            # poses would clip later incremental adds.
+            cpu_idx = faiss.IndexHNSWSQ(512, faiss.ScalarQuantizer.QT_8bit, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            cpu_idx.train(mat)
+        else:
+            cpu_idx = faiss.IndexHNSWFlat(512, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        cpu_idx.hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
         cpu_idx.add(mat)
+        cpu_idx.hnsw.efSearch = FAISS_HNSW_EF_SEARCH
+
+        # Build O(1) lookup table for current metadata
+        aadhar_to_meta = {m["aadhar"]: m for m in mapping}
+        flat = mat if len(mat) <= FAISS_EXACT_MAX_VECTORS else None
 
         with self._lock:
-            self._faiss_index, self._faiss_mapping = cpu_idx, mapping
-            # Build O(1) lookup table for current metadata
-            self._aadhar_to_meta = {m["aadhar"]: m for m in mapping}
+            added = self._replay_rebuild_log(cpu_idx, mapping, aadhar_to_meta)
+            if added is None: return
+            if flat is not None and len(added):
+                flat = np.vstack([flat, added]) if len(flat) + len(added) <= FAISS_EXACT_MAX_VECTORS else None
+            self._faiss_index, self._faiss_mapping, self._aadhar_to_meta = cpu_idx, mapping, aadhar_to_meta
+            self._flat_mat = flat
+            self._tombstones, self._tomb_filter = 0, None
+            self._index_version += 1
         
         try: cache.set("ryuk:index:version", str(time.time()))
         except Exception: pass
-        logger.info(f"FAISS: Loaded {len(embeddings)} vectors for {len(identities)} identities.")
+        logger.info(f"FAISS: Loaded {len(mapping)} vectors for {len(identities)} identities.")
+
+    def _log_mutation(self, *entry):
+        """Record a live-index mutation for the in-flight rebuild, if any (caller holds self._lock)."""
+        if self._rebuild_log is not None: self._rebuild_log.append(entry)
+
+    def _replay_rebuild_log(self, index, mapping: list[dict], aadhar_to_meta: dict[str, dict]) -> np.ndarray | None:
+        """
+        Apply the adds and metadata patches that hit the live index while the
+        rebuild read MongoDB onto the new index (caller holds self._lock), so a
+        steady stream of auto-augments never starves a rebuild. Returns the
+        replayed embeddings, or None when a delete touched a profile in the
+        snapshot or in a logged add: swapping would resurrect it, so the live
+        index is kept and another rebuild scheduled. A pose written just
+        before the snapshot can be replayed twice; the duplicate is harmless
+        and gone after the next rebuild.
+        """
+        log = self._rebuild_log
+        added_ids = {op[2] for op in log if op[0] == "add"}
+        if any(op[0] == "delete" and (op[1] in aadhar_to_meta or op[1] in added_ids) for op in log):
+            self._mark_dirty()
+            return None
+        added = []
+        for op in log:
+            if op[0] == "add":
+                _, embedding, aadhar, fields = op
+                meta = aadhar_to_meta.get(aadhar)
+                if meta is None: meta = aadhar_to_meta[aadhar] = {"aadhar": aadhar, **(fields or {})}
+                elif fields: meta.update(fields)
+                mapping.append(meta)
+                added.append(embedding)
+            elif op[0] == "meta":
+                meta = aadhar_to_meta.get(op[1])
+                if meta is not None: meta.update(op[2])
+        if not added: return np.empty((0, 512), dtype=np.float32)
+        added = np.stack(added)
+        index.add(added)
+        return added
 
     def enroll_face(self, image_path: str, aadhar: str, name: str,
                     threat_level: str = "Low", phone: str = "", address: str = ""):
@@ -163,7 +299,7 @@ class WatchdogIndexer:
         if len(faces) > 1: raise ValueError("Multiple faces in enrolment image.")
 
         face = faces[0]
-        embedding = face.embedding
+        embedding = normalize_rows(face.embedding.astype(np.float32).reshape(1, -1))[0]
         thumb_b64 = ""
         try:
             bbox = face.bbox.astype(int)
@@ -178,42 +314,97 @@ class WatchdogIndexer:
         self._profiles_col.update_one(
             {"aadhar": aadhar},
             {
-                "$set": {"name": name, "threat_level": threat_level, "phone": phone, "address": address, "photo_thumb": thumb_b64},
-                "$push": {"embeddings": {"$each": [embedding.astype(np.float32).tobytes()], "$slice": -MAX_POSES_PER_ID}}
+                "$set": {"name": name, "threat_level": threat_level, "phone": phone, "address": address, "photo_thumb": thumb_b64, "normalized": True},
+                "$push": {"embeddings": {"$each": [embedding.tobytes()], "$slice": -MAX_POSES_PER_ID}}
             },
             upsert=True,
         )
         
-        norm_emb = np.ascontiguousarray(embedding.astype(np.float32))
         with self._lock:
-            if self._faiss_index is None: self.update_index()
-            else:
-                self._faiss_index.add(np.array([norm_emb], dtype="float32"))
-                self._faiss_mapping.append({"aadhar": aadhar, "name": name, "threat_level": threat_level, "phone": phone, "address": address, "photo_thumb": thumb_b64})
+            rebuild = self._faiss_index is None
+            if not rebuild:
+                self._faiss_index.add(embedding.reshape(1, -1))
+                self._append_flat(embedding)
+                meta = {"aadhar": aadhar, "name": name, "threat_level": threat_level, "phone": phone, "address": address, "photo_thumb": thumb_b64}
+                self._faiss_mapping.append(meta)
+                self._aadhar_to_meta[aadhar] = meta
+                self._log_mutation("add", embedding, aadhar, meta)
+                self._index_version += 1
+        if rebuild: self._mark_dirty()
         logger.info(f"FAISS: Enrolled {name}.")
 
     def recognize_face(self, embedding: np.ndarray, threshold: float = FAISS_THRESHOLD, **kwargs) -> dict | None:
+        return self.recognize_faces(embedding.reshape(1, -1), threshold, [kwargs.get("context", {})])[0]
+
+    def recognize_faces(self, embeddings: np.ndarray, threshold: float = FAISS_THRESHOLD,
+                        contexts: list[dict] | None = None) -> list[dict | None]:
+        """
+        Batched recognize_face: every face of a frame goes through one (Q, 512)
+        FAISS search instead of Q single-row ones. Track embeddings are already
+        unit-norm, so inner product is cosine.
+        """
         with self._lock:
-            index, mapping = self._faiss_index, self._faiss_mapping
-        if index is None or index.ntotal == 0: return None
+            index, mapping, flat, tomb = self._faiss_index, self._faiss_mapping, self._flat_mat, self._tomb_filter
+        if index is None or index.ntotal == 0: return [None] * len(embeddings)
         
-        query = np.ascontiguousarray(embedding.reshape(1, -1).astype(np.float32))
-        sims, idxs = index.search(query, k=1)
-        score = float(sims[0][0])
-        
-        current_threshold = self._calculate_adaptive_threshold(kwargs.get("context", {})) if threshold == FAISS_THRESHOLD else threshold
+        queries = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(-1, 512)
+        # Tombstoned rows are excluded inside the search, so the best hit is
+        # always live and k stays 1 however many profiles were deleted
+        if flat is not None:
+            # Small roster: one exact BLAS matmul is cheaper than walking the HNSW graph
+            scores = queries @ flat.T
+            if tomb is not None: scores[:, tomb[0]] = -np.inf
+            idxs = scores.argmax(axis=1)[:, None]
+            sims = np.take_along_axis(scores, idxs, axis=1)
+        else:
+            sims, idxs = self._search_buffers(len(queries), 1)
+            index.search(queries, 1, D=sims, I=idxs, params=tomb[1] if tomb is not None else None)
         
-        result = None
-        if score > current_threshold and idxs[0][0] != -1:
-            result = mapping[idxs[0][0]].copy()
-            result['score'] = score
-            self._known_scores.append(score)
-        elif idxs[0][0] != -1 and score > 0.1:
-            self._unknown_scores.append(score)
-
-        if score > 0.2:
-            logger.debug(f"BIO-LOG: Score: {score:.3f} | Threshold: {current_threshold:.3f} | {'MATCH' if result and result.get('aadhar') else 'REJECT'}")
-        return result
+        results = []
+        for row_sims, row_idxs, context in zip(sims, idxs, contexts or [None] * len(queries)):
+            score, idx = float(row_sims[0]), int(row_idxs[0])
+            # A delete can land between the snapshot and here
+            if idx != -1 and mapping[idx] is None: idx = -1
+            
+            current_threshold = self._calculate_adaptive_threshold(context or {}) if threshold == FAISS_THRESHOLD else threshold
+            
+            result = None
+            if score > current_threshold and idx != -1:
+                result = mapping[idx].copy()
+                result['score'] = score
+                self._known_scores.append(score)
+            elif idx != -1 and score > 0.1:
+                self._unknown_scores.append(score)
+
+            if score > 0.2:
+                logger.debug(f"BIO-LOG: Score: {score:.3f} | Threshold: {current_threshold:.3f} | {'MATCH' if result and result.get('aadhar') else 'REJECT'}")
+            results.append(result)
+        return results
+
+    def _append_flat(self, embedding: np.ndarray):
+        """Mirror an incremental add into the exact-search matrix (caller holds self._lock)."""
+        flat = self._flat_mat
+        if flat is None: return
+        # New array, never in place: readers may still hold the old one
+        self._flat_mat = np.vstack([flat, embedding.reshape(1, -1)]) if len(flat) < FAISS_EXACT_MAX_VECTORS else None
+
+    def _search_buffers(self, n: int, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (n, k) distance/label views into this thread's reusable buffers, so a
+        per-frame search allocates nothing. Results are consumed before the
+        caller returns, and each inference thread has its own pair.
+        """
+        buf = self._scratch
+        if getattr(buf, "sims", None) is None or buf.sims.size < n * k:
+            cap = max(n * k, 64)
+            buf.sims = np.empty(cap, dtype=np.float32)
+            buf.idxs = np.empty(cap, dtype=np.int64)
+        return buf.sims[:n * k].reshape(n, k), buf.idxs[:n * k].reshape(n, k)
+
+    @property
+    def index_version(self) -> int:
+        """Monotonic counter that changes whenever the searchable index does."""
+        return self._index_version
 
     def get_metadata(self, aadhar: str) -> dict | None:
         """High-speed O(1) metadata lookup from the current index mapping."""
@@ -243,14 +434,35 @@ class WatchdogIndexer:
 
     def log_activity(self, aadhar: str, client_id: str):
         if self._activity_col is None: return
+        now = time.monotonic()
+        # Local guard first: a repeat sighting inside the cooldown costs no Redis round trip
+        if self._cooldown_until.get((aadhar, client_id), 0.0) > now: return
         cooldown_key = f"cooldown:log:{aadhar}:{client_id}"
-        if cache_str.exists(cooldown_key): return
+        if cache_str.exists(cooldown_key): return # Logged by another process
+
+        location, device_info = self._camera_location(client_id, now)
+
+        try:
+            # Display strings are formatted on read from the BSON timestamp
+            self._activity_col.insert_one({"aadhar": aadhar, "client_id": client_id, "location": location, "device_info": device_info, "timestamp": datetime.now()})
+            cache_str.setex(cooldown_key, int(LOG_COOLDOWN_S), "1")
+            if len(self._cooldown_until) > 4096:
+                self._cooldown_until = {k: t for k, t in self._cooldown_until.items() if t > now}
+            self._cooldown_until[(aadhar, client_id)] = now + LOG_COOLDOWN_S
+            logger.info(f"Watchdog: Logged {aadhar} @ {location}")
+        except Exception as e: logger.error(f"Watchdog: Log failed — {e}")
+
+    def _camera_location(self, client_id: str, now: float) -> tuple[str, dict]:
+        """(location, device_info) for a camera: process memory, then Redis, then Mongo."""
+        entry = self._cam_cache.get(client_id)
+        if entry and entry[0] > now:
+            return entry[1], entry[2]
 
         loc_key, dev_key = f"cache:cam_loc:{client_id}", f"cache:cam_dev:{client_id}"
-        cached_loc, cached_dev = cache_str.get(loc_key), cache_str.get(dev_key)
+        cached_loc, cached_dev = cache_str.mget(loc_key, dev_key)
         
         if cached_loc and cached_dev:
-            location, device_info = cached_loc, json.loads(cached_dev)
+            location, device_info = cached_loc, orjson.loads(cached_dev)
         else:
             cam = self._cameras_col.find_one({"client_id": client_id}, {"locations": 1, "device_info": 1})
             loc_list = cam.get("locations", []) if cam else []
@@ -259,14 +471,11 @@ class WatchdogIndexer:
             
             pipe = cache_str.pipeline()
             pipe.setex(loc_key, int(CAM_LOC_TTL_S), location)
-            pipe.setex(dev_key, int(CAM_LOC_TTL_S), json.dumps(device_info))
+            pipe.setex(dev_key, int(CAM_LOC_TTL_S), orjson.dumps(device_info))
             pipe.execute()
 
-        try:
-            self._activity_col.insert_one({"aadhar": aadhar, "client_id": client_id, "location": location, "device_info": device_info, "timestamp": datetime.now(), "date_str": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
-            cache_str.setex(cooldown_key, int(LOG_COOLDOWN_S), "1")
-            logger.info(f"Watchdog: Logged {aadhar} @ {location}")
-        except Exception as e: logger.error(f"Watchdog: Log failed — {e}")
+        self._cam_cache[client_id] = (now + CAM_LOC_LOCAL_TTL_S, location, device_info)
+        return location, device_info
 
     def finalize_activity_session(self, aadhar: str, client_id: str, duration: float):
         """Updates the most recent log for this person with their final stay duration."""
@@ -297,7 +506,13 @@ class WatchdogIndexer:
             query: dict = {"aadhar": aadhar}
             if days_ago is not None:
                 query["timestamp"] = {"$gte": datetime.now() - timedelta(days=days_ago)}
-            return list(self._activity_col.find(query, {"_id": 0}).sort("timestamp", -1).limit(limit))
+            # The planner serves this from the (aadhar, timestamp desc) index when
+            # it exists (no hint: a missing index must not fail the report).
+            # Whole page in one batch; rows keep aadhar for the dossier /
+            # activity log consumers
+            cursor = (self._activity_col.find(query, {"_id": 0})
+                      .sort("timestamp", -1).limit(limit).batch_size(limit))
+            return list(cursor)
         except Exception as e:
             logger.error(f"Watchdog: Report failed — {e}")
             return []
@@ -306,6 +521,7 @@ class WatchdogIndexer:
         if self._cameras_col is None: return
         self._cameras_col.delete_one({"client_id": client_id})
         cache_str.delete(f"cache:cam_loc:{client_id}", f"cache:cam_dev:{client_id}")
+        self._cam_cache.pop(client_id, None)
         logger.info(f"MongoDB: Deleted Camera {client_id}")
 
     def register_camera_metadata(self, client_id: str, locations: list, source: str = None):
@@ -313,6 +529,8 @@ class WatchdogIndexer:
         update_data = {"locations": locations[:2]}
         if source: update_data["source"] = source
         self._cameras_col.update_one({"client_id": client_id}, {"$set": update_data}, upsert=True)
+        cache_str.delete(f"cache:cam_loc:{client_id}", f"cache:cam_dev:{client_id}")
+        self._cam_cache.pop(client_id, None)
         logger.info(f"MongoDB: Camera {client_id} → {locations} (Source: {source})")
 
     def get_all_profiles(self) -> list[dict]:
@@ -321,20 +539,66 @@ class WatchdogIndexer:
         except Exception: return []
 
     def delete_profile(self, aadhar: str):
+        """
+        Deletes a profile without a full rebuild. HNSW cannot remove vectors, so
+        the profile's rows are tombstoned in the mapping and skipped at search
+        time; the index is compacted once tombstones pass the rebuild ratio.
+        """
         if self._profiles_col is None: return
-        self._profiles_col.delete_one({"aadhar": aadhar}); self.update_index()
+        self._profiles_col.delete_one({"aadhar": aadhar})
+        with self._lock:
+            mapping = self._faiss_mapping
+            rows = [i for i, m in enumerate(mapping) if m is not None and m["aadhar"] == aadhar]
+            for i in rows: mapping[i] = None
+            self._aadhar_to_meta.pop(aadhar, None)
+            self._tombstones += len(rows)
+            self._refresh_tomb_filter()
+            self._log_mutation("delete", aadhar)
+            self._index_version += 1
+            compact = self._tombstones > FAISS_TOMBSTONE_REBUILD_RATIO * max(len(mapping), 1)
+        if compact: self._mark_dirty()
+
+    def _refresh_tomb_filter(self):
+        """
+        Rebuild the search-time exclusion of tombstoned rows (caller holds
+        self._lock). HNSW skips them via an IDSelector; the exact path masks
+        the same rows. The selectors are kept referenced alongside the params.
+        """
+        dead = np.flatnonzero(np.fromiter((m is None for m in self._faiss_mapping), dtype=bool,
+                                          count=len(self._faiss_mapping))).astype(np.int64)
+        if not len(dead):
+            self._tomb_filter = None
+            return
+        batch = faiss.IDSelectorBatch(dead)
+        sel = faiss.IDSelectorNot(batch)
+        params = faiss.SearchParametersHNSW(sel=sel, efSearch=FAISS_HNSW_EF_SEARCH)
+        self._tomb_filter = (dead, params, sel, batch)
 
     def update_profile(self, aadhar: str, data: dict):
         if self._profiles_col is None: return
-        self._profiles_col.update_one({"aadhar": aadhar}, {"$set": data}); self.update_index()
+        self._profiles_col.update_one({"aadhar": aadhar}, {"$set": data})
+        if not set(data) <= set(_META_FIELDS):
+            self._mark_dirty() # Embeddings or identity key changed
+            return
+        # Metadata-only edit (the common case): patch the live mapping in place
+        with self._lock:
+            for m in self._faiss_mapping:
+                if m is not None and m["aadhar"] == aadhar: m.update(data)
+            if aadhar in self._aadhar_to_meta: self._aadhar_to_meta[aadhar].update(data)
+            self._log_mutation("meta", aadhar, dict(data))
+            self._index_version += 1 # Pinned tracks re-read name / threat level
 
     def augment_identity(self, aadhar: str, embedding: np.ndarray):
         if self._profiles_col is None or not aadhar: return
-        self._profiles_col.update_one({"aadhar": aadhar}, {"$push": {"embeddings": {"$each": [embedding.astype(np.float32).tobytes()], "$slice": -MAX_POSES_PER_ID}}})
-        norm_emb = np.ascontiguousarray(embedding.astype(np.float32))
+        embedding = normalize_rows(embedding.astype(np.float32).reshape(1, -1))[0]
+        self._profiles_col.update_one({"aadhar": aadhar}, {"$push": {"embeddings": {"$each": [embedding.tobytes()], "$slice": -MAX_POSES_PER_ID}}})
         with self._lock:
-            if self._faiss_index is None: self.update_index()
-            else:
-                self._faiss_index.add(np.array([norm_emb], dtype="float32"))
-                meta = next((m for m in self._faiss_mapping if m["aadhar"] == aadhar), {"aadhar": aadhar})
+            rebuild = self._faiss_index is None
+            if not rebuild:
+                self._faiss_index.add(embedding.reshape(1, -1))
+                self._append_flat(embedding)
+                meta = next((m for m in self._faiss_mapping if m is not None and m["aadhar"] == aadhar), {"aadhar": aadhar})
                 self._faiss_mapping.append(meta)
+                self._log_mutation("add", embedding, aadhar, None)
+                self._index_version += 1
+        if rebuild: self._mark_dirty()
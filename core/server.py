@@ -7,16 +7,41 @@ instantiate or test without triggering side-effects.
 
 `server = StreamingServer()` creates the instance.
 `app = server.app` is kept for uvicorn compatibility.
-`run_server()` is a module-level shim for backward compatibility.
+`UVICORN_OPTIONS` holds the transport settings for whichever uvicorn serves
+the app (main.py passes them through NiceGUI's ui.run).
 """
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket
 import uvicorn
 import json
 import asyncio
 from datetime import datetime
-
-from core.state import cache, new_stream_signals
-from config import SERVER_HOST, SERVER_PORT
+from pymongo import UpdateOne
+
+from core.state import acache, STREAM_EVENTS_KEY, STREAM_EVENTS_MAXLEN
+import core.serialization as serde
+from core.logger import logger
+from config import SERVER_HOST, SERVER_PORT, SERVER_WS_MAX_SIZE, SERVER_WS_PING_INTERVAL_S
+
+try:
+    import uvloop  # noqa: F401  (uvicorn imports it itself; this only probes)
+    _EVENT_LOOP = "uvloop"
+except ImportError:
+    _EVENT_LOOP = "asyncio"  # No uvloop on Windows
+
+try:
+    import httptools  # noqa: F401
+    _HTTP_IMPL = "httptools"
+except ImportError:
+    _HTTP_IMPL = "auto"
+
+# uvloop, httptools and the websockets C extension come with uvicorn[standard]
+UVICORN_OPTIONS = {
+    "loop": _EVENT_LOOP,
+    "http": _HTTP_IMPL,
+    "ws": "websockets",
+    "ws_max_size": SERVER_WS_MAX_SIZE,
+    "ws_ping_interval": SERVER_WS_PING_INTERVAL_S,
+}
 
 
 class StreamingServer:
@@ -28,6 +53,9 @@ class StreamingServer:
     def __init__(self):
         self.app = FastAPI(title="Ryuk AI Streaming Server")
         self._alert_clients: set[WebSocket] = set()
+        # Camera status writes, coalesced per client_id and flushed in bulk
+        self._pending_status: dict[str, dict] = {}
+        self._status_task: asyncio.Task | None = None
         self._register_routes()
 
     # ------------------------------------------------------------------
@@ -56,12 +84,16 @@ class StreamingServer:
     async def _handle_camera(self, websocket: WebSocket):
         host      = websocket.client.host
         port      = websocket.client.port
-        print(f"DEBUG: Connection attempt from {host}:{port}")
+        logger.debug(f"Connection attempt from {host}:{port}")
         await websocket.accept()
         client_id = f"{host}:{port}"
-        print(f"DEBUG: Camera {client_id} connected and accepted.")
-        cache.sadd("registry:active_streams", client_id)
-        new_stream_signals.append(client_id)
+        logger.info(f"Camera {client_id} connected and accepted.")
+        # Register + announce in one round-trip; UIs pick the event up from the stream
+        pipe = acache.pipeline(transaction=False)
+        pipe.sadd("registry:active_streams", client_id)
+        pipe.xadd(STREAM_EVENTS_KEY, {"client_id": client_id, "kind": "up"},
+                  maxlen=STREAM_EVENTS_MAXLEN, approximate=True)
+        await pipe.execute()
 
         # Extract device details from headers and query params
         headers = dict(websocket.headers)
@@ -78,80 +110,95 @@ class StreamingServer:
             "stream_type": stream_type
         }
 
-        # Log connection to MongoDB (async)
-        from core.database import cameras_col
-        await cameras_col.update_one(
-            {"client_id": client_id},
-            {"$set": {
-                "host": host, 
-                "port": port,
-                "device_info": device_info,
-                "last_connected": datetime.now(), 
-                "status": "online",
-                "stream_type": stream_type
-            }},
-            upsert=True,
-        )
+        # Log connection to MongoDB (batched, async)
+        self._queue_camera_status(client_id, {
+            "host": host, 
+            "port": port,
+            "device_info": device_info,
+            "last_connected": datetime.now(), 
+            "status": "online",
+            "stream_type": stream_type
+        })
 
         try:
             count = 0
-            while True:
-                data = await websocket.receive_bytes()
+            # iter_bytes ends cleanly on disconnect instead of raising
+            async for data in websocket.iter_bytes():
                 count += 1
                 
+                # All writes for this frame go out as one non-blocking round-trip
+                pipe = acache.pipeline(transaction=False)
+
                 # Tagged routing based on stream type
                 if stream_type == "sub":
-                    cache.set(f"stream:{client_id}:sub:frame", data, ex=5)
+                    pipe.set(f"stream:{client_id}:sub:frame", data, ex=5)
                 else:
-                    cache.set(f"stream:{client_id}:main:frame", data, ex=5)
+                    pipe.set(f"stream:{client_id}:main:frame", data, ex=5)
                     # Legacy support: also set the main key for backward compat
-                    cache.set(f"stream:{client_id}:frame", data, ex=5)
+                    pipe.set(f"stream:{client_id}:frame", data, ex=5)
                     
                     # Push ONLY main frames to the AI pipeline
-                    import core.serialization as serde
                     packet = {
                         "client_id": client_id,
                         "frame_count": count,
                         "timestamp": datetime.now().timestamp(),
                         "frame_bytes": data 
                     }
-                    cache.rpush("ryuk:ingest", serde.pack(packet))
-                    if cache.llen("ryuk:ingest") > 50:
-                        cache.lpop("ryuk:ingest")
+                    pipe.rpush("ryuk:ingest", serde.pack(packet))
+                    pipe.ltrim("ryuk:ingest", -50, -1) # Cap backlog (was LLEN + LPOP)
+
+                # Push the frame to blocked consumers so they need no follow-up GET
+                pipe.publish(f"stream:{client_id}:new", data)
+                await pipe.execute()
                 
                 if count <= 5 or count % 100 == 0:
-                    print(f"DEBUG: Camera {client_id} ({stream_type}) — Received frame {count}")
-        except WebSocketDisconnect:
-            print(f"Camera {client_id} disconnected.")
+                    logger.debug(f"Camera {client_id} ({stream_type}) — Received frame {count}")
+            logger.info(f"Camera {client_id} disconnected.")
         finally:
-            cache.srem("registry:active_streams", client_id)
-            cache.delete(f"stream:{client_id}:frame")
-            from core.database import cameras_col as col
-            await col.update_one(
-                {"client_id": client_id},
-                {"$set": {"status": "offline"}},
-            )
+            await acache.srem("registry:active_streams", client_id)
+            await acache.delete(f"stream:{client_id}:frame")
+            self._queue_camera_status(client_id, {"status": "offline"})
+
+    def _queue_camera_status(self, client_id: str, fields: dict):
+        """Merge a status change into the pending batch (latest field wins)."""
+        self._pending_status.setdefault(client_id, {}).update(fields)
+        if self._status_task is None or self._status_task.done():
+            self._status_task = asyncio.create_task(self._flush_camera_status())
+
+    async def _flush_camera_status(self, interval_s: float = 0.1):
+        """One unordered bulk_write per tick instead of a round-trip per connect/disconnect."""
+        from core.database import cameras_col
+        while self._pending_status:
+            await asyncio.sleep(interval_s)
+            pending, self._pending_status = self._pending_status, {}
+            try:
+                await cameras_col.bulk_write(
+                    [UpdateOne({"client_id": cid}, {"$set": fields}, upsert=True) for cid, fields in pending.items()],
+                    ordered=False,
+                )
+            except Exception as e:
+                logger.error(f"Camera status flush failed: {e}")
 
     async def _handle_alerts(self, websocket: WebSocket):
         """Bridge Redis pub/sub → WebSocket for alert consumers."""
         await websocket.accept()
         self._alert_clients.add(websocket)
-        print("Alert client connected.")
+        logger.info("Alert client connected.")
 
-        pubsub = cache.pubsub()
-        pubsub.subscribe("security_alerts")
+        # Async pub/sub: listen() parks in the event loop until an alert
+        # arrives, instead of waking 10x/s per client to poll.
+        pubsub = acache.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe("security_alerts")
 
         try:
-            while True:
-                msg = pubsub.get_message(ignore_subscribe_messages=True)
-                if msg:
-                    await websocket.send_text(msg["data"].decode("utf-8"))
-                await asyncio.sleep(0.1)
+            async for msg in pubsub.listen():
+                await websocket.send_text(msg["data"].decode("utf-8"))
         except Exception:
             pass
         finally:
+            await pubsub.aclose()
             self._alert_clients.discard(websocket)
-            print("Alert client disconnected.")
+            logger.info("Alert client disconnected.")
 
     # ------------------------------------------------------------------
     # Server lifecycle
@@ -159,15 +206,11 @@ class StreamingServer:
 
     def run(self, host: str = SERVER_HOST, port: int = SERVER_PORT):
         """Start uvicorn synchronously (call from a background thread)."""
-        uvicorn.run(self.app, host=host, port=port, log_level="info")
+        uvicorn.run(self.app, host=host, port=port, log_level="info", **UVICORN_OPTIONS)
 
 
 # ---------------------------------------------------------------------------
-# Module-level singleton + backward-compat shims
+# Module-level singleton
 # ---------------------------------------------------------------------------
 server = StreamingServer()
-app    = server.app           # uvicorn / main.py references this directly
-
-def run_server(host: str, port: int = SERVER_PORT):
-    """Backward-compatible entry point used by main.py."""
-    server.run(host, port)
+app    = server.app           # uvicorn / ui.nice_gui mounts this directly
@@ -1,6 +1,6 @@
 import redis
+import redis.asyncio as aioredis
 from redis import ConnectionPool
-from collections import deque
 
 # ---------------------------------------------------------------------------
 # Signals (Replaced with lightweight Python threading events where needed)
@@ -13,6 +13,8 @@ from collections import deque
 #   1. `cache`     – decode_responses=False (stores raw binary JPEG frames)
 #   2. `cache_str` – decode_responses=True  (string keys: cooldown, locks, JSON)
 #      Using separate clients avoids .decode('utf-8') call-sites everywhere.
+# `acache` is an asyncio twin of `cache` for the FastAPI event loop, so frame
+# ingest never blocks the loop on a socket round-trip.
 # ---------------------------------------------------------------------------
 _binary_pool = ConnectionPool(
     host='localhost', port=6379, db=0,
@@ -27,16 +29,52 @@ _string_pool = ConnectionPool(
 
 # Keyspace Definitions:
 # "stream:{client_id}:frame" -> Binary JPEG data (String with TTL)  [binary pool]
+# "stream:{client_id}:new"   -> Pub/Sub channel carrying each new JPEG      [binary pool]
 # "registry:active_streams"  -> Set of client IDs                   [binary pool]
-# "signal:new_stream"        -> List for Pub/Sub-like notifications  [binary pool]
+# "stream:events"            -> Redis Stream of camera-up events (MAXLEN ~1024) [binary pool]
 # "cache:face:{hash}"        -> (Removed) Embedding hash cache deleted
 # "cooldown:log:{a}:{c}"     -> Cooldown flag (TTL 120s)             [string pool]
 # "cache:cam_loc:{client_id}"-> Camera location JSON (TTL 3600s)     [string pool]
 
 cache = redis.Redis(connection_pool=_binary_pool)
 cache_str = redis.Redis(connection_pool=_string_pool)
+acache = aioredis.Redis(
+    host='localhost', port=6379, db=0,
+    max_connections=20,
+    decode_responses=False
+)
 
 # Redis verification is now performed in main.py startup block
 
-# We keep this for UI transition logic to avoid breaking current dashboard polling immediately
-new_stream_signals = deque()
+STREAM_EVENTS_KEY = "stream:events"
+STREAM_EVENTS_MAXLEN = 1024
+
+def poll_new_streams(cursor: str | bytes | None = None) -> tuple[str | bytes, list[str]]:
+    """
+    Non-blocking read of camera-up events after `cursor`. Every UI keeps its
+    own cursor, so all of them (in any process) see each event. Returns the
+    advanced cursor and the announced client IDs that are still live.
+
+    The first call (cursor None) does not replay the stream's history: it
+    starts at the current end and returns the cameras streaming right now.
+    """
+    if cursor is None:
+        return _stream_events_start()
+    resp = cache.xread({STREAM_EVENTS_KEY: cursor}, count=STREAM_EVENTS_MAXLEN)
+    if not resp:
+        return cursor, []
+    entries = resp[0][1]
+    client_ids = list(dict.fromkeys(fields[b"client_id"].decode() for _, fields in entries))
+    live = cache.smembers("registry:active_streams")
+    return entries[-1][0], [cid for cid in client_ids if cid.encode() in live]
+
+def _stream_events_start() -> tuple[str | bytes, list[str]]:
+    # Cursor first: a camera announced in between is seen twice, never missed
+    last = cache.xrevrange(STREAM_EVENTS_KEY, count=1)
+    cursor = last[0][0] if last else "0-0"
+    # The set outlives crashed servers; only attach cameras still pushing frames
+    client_ids = sorted(m.decode() for m in cache.smembers("registry:active_streams"))
+    pipe = cache.pipeline(transaction=False)
+    for cid in client_ids:
+        pipe.exists(f"stream:{cid}:main:frame", f"stream:{cid}:sub:frame")
+    return cursor, [cid for cid, n in zip(client_ids, pipe.execute()) if n]
@@ -10,13 +10,16 @@ from config import FAISS_THRESHOLD
 _indexer = WatchdogIndexer()
 
 def update_faiss_index():           _indexer.update_index()
-def rebuild_index_background():     return threading.Thread(target=_indexer.update_index, daemon=True).start()
+def rebuild_index_background():     _indexer._mark_dirty()
 def enroll_face(*a, **kw):          _indexer.enroll_face(*a, **kw)
 def recognize_face(emb, threshold=FAISS_THRESHOLD, **kwargs):
     return _indexer.recognize_face(emb, threshold, **kwargs)
+def recognize_faces(embs, threshold=FAISS_THRESHOLD, contexts=None):
+    return _indexer.recognize_faces(embs, threshold, contexts)
 def get_metadata(aadhar):           return _indexer.get_metadata(aadhar)
+def get_index_version():            return _indexer.index_version
 def log_activity(aadhar, client_id): _indexer.log_activity(aadhar, client_id)
-def get_profile(aadhar):             return _indexer._profiles_col.find_one({"aadhar": aadhar})
+def get_profile(aadhar):             return _indexer._profiles_col.find_one({"aadhar": aadhar}, {"_id": 0})
 def get_all_profiles():             return _indexer.get_all_profiles()
 def delete_profile(aadhar):         _indexer.delete_profile(aadhar)
 def update_profile(aadhar, data):   _indexer.update_profile(aadhar, data)
@@ -26,9 +29,3 @@ def augment_identity(aadhar, emb):  _indexer.augment_identity(aadhar, emb)
 def delete_camera(cid):             _indexer.delete_camera(cid)
 def register_camera_metadata(cid, locs, source=None): _indexer.register_camera_metadata(cid, locs, source)
 def finalize_activity_session(*a, **kw): _indexer.finalize_activity_session(*a, **kw)
-
-# Legacy aliases
-faiss_index   = property(lambda _: _indexer._faiss_index)
-faiss_mapping = property(lambda _: _indexer._faiss_mapping)
-
-import threading # Needed for rebuild_index_background shim
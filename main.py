@@ -63,6 +63,7 @@ if __name__ == "__main__":
     # 1. Core Process Initialization
     ng_ui = _bootstrap()
     lan_ip = get_lan_ip()
+    from core.server import UVICORN_OPTIONS
 
     # 2. Start the Background Manager process
     # This process handles UnifiedEngine and Sink, keeping main.py focused on UI.
@@ -89,7 +90,8 @@ if __name__ == "__main__":
             dark=True,
             reload=False,
             show=False,
-            uvicorn_logging_level='warning'  # Suppress routine request logs on shutdown
+            uvicorn_logging_level='warning',  # Suppress routine request logs on shutdown
+            **UVICORN_OPTIONS  # Camera websockets are served by this uvicorn (/api mount)
         )
     except KeyboardInterrupt:
         print("\n* Signal Received: Terminating services...")
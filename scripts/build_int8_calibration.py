@@ -0,0 +1,82 @@
+"""
+Builds the TensorRT INT8 calibration table for the recognition model.
+
+Usage: python scripts/build_int8_calibration.py <dir of face images> [max_images]
+
+Faces are detected and aligned with the live pipeline, so the calibration
+data matches what recognition sees in production (~500 crops is plenty).
+"""
+import sys
+import os
+import glob
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from insightface.utils import face_align
+from onnxruntime.quantization import CalibrationDataReader, CalibrationMethod, create_calibrator, write_calibration_table
+
+from core.ai_processor import face_app
+from config import TRT_INT8_CACHE_DIR, TRT_INT8_CALIB_TABLE
+
+
+class ChipReader(CalibrationDataReader):
+    def __init__(self, rec_model, chips):
+        self._input_name = rec_model.input_name
+        self._blobs = iter(
+            cv2.dnn.blobFromImage(chip, 1.0 / rec_model.input_std, (112, 112),
+                                  (rec_model.input_mean,) * 3, swapRB=True)
+            for chip in chips
+        )
+
+    def get_next(self):
+        blob = next(self._blobs, None)
+        return None if blob is None else {self._input_name: blob}
+
+
+def collect_chips(image_dir: str, max_images: int) -> list[np.ndarray]:
+    det_model = face_app.app.models['detection']
+    chips = []
+    for path in sorted(glob.glob(os.path.join(image_dir, "*")))[:max_images]:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        bboxes, kpss = det_model.detect(img, max_num=5)
+        for kps in (kpss if kpss is not None else []):
+            chips.append(face_align.norm_crop(img, landmark=kps, image_size=112))
+    return chips
+
+
+def build_table(image_dir: str, max_images: int = 500):
+    rec_model = face_app.app.models['recognition']
+    chips = collect_chips(image_dir, max_images)
+    print(f"Calibrating on {len(chips)} aligned face crops...")
+    if not chips:
+        print("No faces found; nothing written.")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calibrator = create_calibrator(
+            rec_model.model_file, [],
+            augmented_model_path=os.path.join(tmp, "augmented.onnx"),
+            calibrate_method=CalibrationMethod.MinMax,
+        )
+        calibrator.set_execution_providers(["CUDAExecutionProvider", "CPUExecutionProvider"])
+        calibrator.collect_data(ChipReader(rec_model, chips))
+        write_calibration_table(calibrator.compute_data(), dir=tmp)
+
+        os.makedirs(TRT_INT8_CACHE_DIR, exist_ok=True)
+        # The TRT EP reads ORT's flatbuffers table (non-native format)
+        dst = os.path.join(TRT_INT8_CACHE_DIR, TRT_INT8_CALIB_TABLE)
+        shutil.copy(os.path.join(tmp, "calibration.flatbuffers"), dst)
+    print(f"SUCCESS: Calibration table written to {dst}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    build_table(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 500)
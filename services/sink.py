@@ -13,7 +13,7 @@ bootstrap_gpu()
 # Normal imports — GPU libs are now resolvable by the dynamic linker
 # ============================================================================
 import time
-import json
+import orjson
 
 
 import core.watchdog_indexer as watchdog
@@ -52,6 +52,9 @@ def run_sink_service():
                 
             start_time = time.time()
             
+            # Cooldown-gated actions for this packet: (lock_key, ttl_s, kind, arg)
+            actions = []
+            faces = packet.get('faces', [])
             for i, res in enumerate(recognition):
                 if not res or 'name' not in res:
                     continue
@@ -62,22 +65,15 @@ def run_sink_service():
                 
                 if aadhar and name != "Unknown":
                     # 1. Activity Logging (with cooldown)
-                    lock_key = f"log_lock:{aadhar}:{client_id}"
-                    if not cache_str.get(lock_key):
-                        watchdog.log_activity(aadhar, client_id)
-                        cache_str.set(lock_key, "1", ex=int(LOG_COOLDOWN_S))
+                    actions.append((f"log_lock:{aadhar}:{client_id}", int(LOG_COOLDOWN_S), "log", aadhar))
                         
                     # 2. Auto-Augmentation (Frontal face update)
-                    faces = packet.get('faces', [])
                     if i < len(faces):
                         face_obj = faces[i]
                         pose = face_obj.get("pose", [0, 0, 0])
                         # If pose is stable (near zero), augment
                         if all(abs(angle) < 15 for angle in pose):
-                            aug_lock = f"aug_lock:{aadhar}"
-                            if not cache_str.get(aug_lock):
-                                watchdog.augment_identity(aadhar, face_obj.get('embedding'))
-                                cache_str.set(aug_lock, "1", ex=3600)
+                            actions.append((f"aug_lock:{aadhar}", 3600, "augment", (aadhar, face_obj.get('embedding'))))
                 
                 # 3. Intelligence & Security Alerts
                 if aadhar:
@@ -94,21 +90,35 @@ def run_sink_service():
                     
                     # High/Medium/Critical priority alerts get published immediately (with cooldown)
                     if threat.lower() in ["high", "medium", "critical"]:
-                        alert_lock = f"alert_lock:{aadhar}:{client_id}"
-                        if not cache_str.get(alert_lock):
-                            cache.publish("security_alerts", json.dumps(msg_data))
-                            # Slightly faster cooldown for Medium if needed, but keeping consistent for now
-                            cache_str.set(alert_lock, "1", ex=int(ALERT_COOLDOWN_S))
+                        actions.append((f"alert_lock:{aadhar}:{client_id}", int(ALERT_COOLDOWN_S), "publish", msg_data))
                     else:
-                        # Normal intelligence updates
-                        intel_lock = f"intel_lock:{aadhar}:{client_id}"
-                        if not cache_str.get(intel_lock):
-                            cache.publish("security_alerts", json.dumps(msg_data))
-                            cache_str.set(intel_lock, "1", ex=10) # 10s cooldown for regular intel
+                        # Normal intelligence updates (10s cooldown for regular intel)
+                        actions.append((f"intel_lock:{aadhar}:{client_id}", 10, "publish", msg_data))
+
+            # SET NX EX takes each cooldown lock atomically; all locks go out in
+            # one round-trip instead of a GET + SET per face
+            acquired = []
+            if actions:
+                pipe = cache_str.pipeline(transaction=False)
+                for key, ttl, _, _ in actions:
+                    pipe.set(key, "1", ex=ttl, nx=True)
+                acquired = pipe.execute()
+
+            pipe = cache.pipeline(transaction=False)
+            for (_, _, kind, arg), ok in zip(actions, acquired):
+                if not ok:
+                    continue
+                if kind == "log":
+                    watchdog.log_activity(arg, client_id)
+                elif kind == "augment":
+                    watchdog.augment_identity(*arg)
+                else:
+                    pipe.publish("security_alerts", orjson.dumps(arg))
 
             res_key = f"stream:{client_id}:results"
-            cache.rpush(res_key, serde.pack(packet))
-            cache.ltrim(res_key, -5, -1) # Keep only 5 recent results
+            pipe.rpush(res_key, serde.pack(packet))
+            pipe.ltrim(res_key, -5, -1) # Keep only 5 recent results
+            pipe.execute()
             
             if packet.get('frame_count', 0) % 50 == 0:
                 print(f"SINK: Finished processing {client_id} | Faces: {len(recognition)}")
@@ -18,7 +18,11 @@ from core.state import cache
 import core.serialization as serde
 import core.watchdog_indexer as watchdog
 from core.deep_sort import DeepSortTracker
-from config import FAISS_THRESHOLD, AI_BATCH_SIZE, DETECTION_INTERVAL, TRACKING_ONLY_ENABLED
+from core.hw_decoder import get_nvjpeg_decoder
+from config import (
+    FAISS_THRESHOLD, AI_BATCH_SIZE, DETECTION_INTERVAL, TRACKING_ONLY_ENABLED,
+    RECOGNITION_CACHE_MIN_SIM, REDUCED_DECODE_MIN_SIDE,
+)
 
 class UnifiedInferenceEngine:
     """
@@ -31,6 +35,7 @@ class UnifiedInferenceEngine:
         self.log("[UnifiedEngine] Initialized and connected to GlobalAIProcessor.")
         self._decoders = {} # client_id -> JpegBatchDecoder
         self._decoder_lock = threading.Lock()
+        self._decode_factors = {} # client_id -> libjpeg reduction factor (1, 2, 4, 8)
         
         # Per-client tracking state
         self.trackers = {} # client_id -> DeepSortTracker
@@ -67,6 +72,34 @@ class UnifiedInferenceEngine:
             entry["last_used"] = time.time()
             return entry["decoder"]
 
+    def _cpu_decode(self, client_id, frame_bytes):
+        """
+        Decodes for inference only, letting libjpeg skip IDCT work via
+        IMREAD_REDUCED_* when the source is large. The first frame per client
+        is decoded at full size to learn the resolution.
+        Returns (frame, factor); detector coordinates must be multiplied by factor.
+        """
+        import cv2
+        arr = np.frombuffer(frame_bytes, np.uint8)
+        factor = self._decode_factors.get(client_id)
+        if factor is None:
+            frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+            if frame is None: return None, 1
+            long_side = max(frame.shape[:2])
+            factor = 1
+            while factor < 8 and long_side // (factor * 2) >= REDUCED_DECODE_MIN_SIDE:
+                factor *= 2
+            self._decode_factors[client_id] = factor
+            return frame, 1
+
+        flag = {
+            1: cv2.IMREAD_COLOR,
+            2: cv2.IMREAD_REDUCED_COLOR_2,
+            4: cv2.IMREAD_REDUCED_COLOR_4,
+            8: cv2.IMREAD_REDUCED_COLOR_8,
+        }[factor]
+        return cv2.imdecode(arr, flag), factor
+
     def log(self, msg):
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
         formatted = f"[{timestamp}] {msg}\n"
@@ -81,11 +114,16 @@ class UnifiedInferenceEngine:
         """
         client_id = packet.get('client_id')
         frame = packet.get('frame')
+        decode_factor = 1
         
         if frame is None and 'frame_bytes' in packet:
             # Decode frame if passed as bytes (from core/server.py)
             from config import USE_FFMPEG_CUDA
-            if USE_FFMPEG_CUDA:
+            nvjpeg = get_nvjpeg_decoder()
+            if nvjpeg:
+                frame = nvjpeg.decode(packet['frame_bytes'])
+
+            if frame is None and USE_FFMPEG_CUDA:
                 decoder = self._get_decoder(client_id, packet['frame_bytes'])
                 if decoder:
                     frame = decoder.decode(packet['frame_bytes'])
@@ -93,9 +131,7 @@ class UnifiedInferenceEngine:
             if frame is None:
                 # Fallback to CPU if decoder failed or disabled
                 try:
-                    import cv2
-                    arr = np.frombuffer(packet['frame_bytes'], np.uint8)
-                    frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+                    frame, decode_factor = self._cpu_decode(client_id, packet['frame_bytes'])
                 except Exception as e:
                     print(f"[UnifiedEngine] Decode Error: {e}")
                     return None
@@ -131,7 +167,7 @@ class UnifiedInferenceEngine:
             if res:
                 detected_faces = res.get("faces", []) or []
                 tracker.predict() # Always predict before update
-                tracker.update(detected_faces)
+                tracker.update(detected_faces, scale=1.0 / decode_factor)
                 self.frame_counts[client_id] = 0
                 # self.log(f"[UnifiedEngine] Full Detection for {client_id}")
             else:
@@ -144,16 +180,21 @@ class UnifiedInferenceEngine:
             # self.log(f"[UnifiedEngine] Tracking Only for {client_id}")
             
         # 2. Extract Results from Tracker (Common for both paths)
-        active_tracks = [t for t in tracker.tracks.values() if t.state == 1 or t.hits > 0]
+        active_tracks = [t for t in list(tracker.tracks.values()) if t.state == 1 or t.hits > 0]
+        index_version = watchdog.get_index_version()
+        pending: list[tuple[int, object]] = [] # (slot in search_results, track) needing a FAISS search
         
         for track in active_tracks:
             # Convert track back to a format downstream expects
             # We use a dummy Face-like dict for compatibility
+            # Unit-norm embeddings survive half precision with negligible cosine
+            # error; float16 halves the per-face payload on ryuk:faiss/results.
+            emb = track.face_embedding
             face_data = {
-                "bbox": track.smoothed_bbox,
+                "bbox": track.smoothed_bbox.copy(), # Tracker smooths this buffer in place
                 "track_id": track.track_id,
                 "det_score": 1.0 if not run_detection else 0.9, # Tracker confidence
-                "embedding": track.face_embedding
+                "embedding": emb.astype(np.float16) if emb is not None else None
             }
             faces.append(face_data)
             
@@ -167,17 +208,29 @@ class UnifiedInferenceEngine:
                     # Profile might have been deleted, fallback
                     search_results.append({"name": "Unknown", "threat_level": "Low"})
             elif track.face_embedding is not None:
-                # Need to recognize
-                try:
-                    context = {"pose": [0,0,0], "norm": 30.0}
-                    ident = watchdog.recognize_face(track.face_embedding, threshold=FAISS_THRESHOLD, context=context)
-                    if ident and ident.get("aadhar") and ident.get("aadhar") != "Unknown":
-                        track.identity_id = ident["aadhar"] # Pin the ID, not the whole dict
-                    search_results.append(ident if ident else {"name": "Unknown", "threat_level": "Low"})
-                except:
-                    search_results.append({"name": "Unknown", "threat_level": "Low"})
+                # Need to recognize, unless this embedding already missed
+                # against the current index (tracking-only frames, static faces)
+                if not track.recognition_cached(index_version, RECOGNITION_CACHE_MIN_SIM):
+                    pending.append((len(search_results), track))
+                search_results.append({"name": "Unknown", "threat_level": "Low"})
             else:
                 search_results.append({"name": "Unknown", "threat_level": "Low"})
+
+        # One batched FAISS search for every unidentified track in this frame
+        if pending:
+            try:
+                context = {"pose": [0,0,0], "norm": 30.0}
+                idents = watchdog.recognize_faces(
+                    np.stack([track.face_embedding for _, track in pending]),
+                    threshold=FAISS_THRESHOLD, contexts=[context] * len(pending))
+                for (slot, track), ident in zip(pending, idents):
+                    if ident and ident.get("aadhar") and ident.get("aadhar") != "Unknown":
+                        track.identity_id = ident["aadhar"] # Pin the ID, not the whole dict
+                    else:
+                        track.mark_unrecognised(index_version)
+                    if ident: search_results[slot] = ident
+            except Exception as e:
+                self.log(f"[UnifiedEngine] Recognition error: {e}")
         
         latency = (time.time() - start_time) * 1000
         
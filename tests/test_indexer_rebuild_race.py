@@ -0,0 +1,94 @@
+import threading
+import numpy as np
+from core.registry.indexer import WatchdogIndexer
+
+class _Cursor(list):
+    def batch_size(self, n): return self
+
+class _Profiles:
+    """In-memory stand-in for the profiles collection; on_find runs mid-read."""
+    def __init__(self, docs):
+        self.docs = docs
+        self.on_find = None
+
+    def find(self, query, projection):
+        snapshot = _Cursor(dict(d) for d in self.docs)
+        if self.on_find:
+            hook, self.on_find = self.on_find, None
+            hook()
+        return snapshot
+
+    def delete_one(self, query):
+        self.docs = [d for d in self.docs if d["aadhar"] != query["aadhar"]]
+
+    def update_one(self, query, update):
+        for d in self.docs:
+            if d["aadhar"] == query["aadhar"]:
+                d["embeddings"] = d["embeddings"] + update["$push"]["embeddings"]["$each"]
+
+def _indexer(docs):
+    idx = WatchdogIndexer.__new__(WatchdogIndexer)
+    idx._db = object()
+    idx._profiles_col = _Profiles(docs)
+    idx._lock = threading.Lock()
+    idx._rebuild_lock = threading.Lock()
+    idx._dirty = threading.Event()
+    idx._rebuild_log = None
+    idx._index_version = 0
+    idx._tombstones, idx._tomb_filter = 0, None
+    idx._faiss_index, idx._faiss_mapping, idx._flat_mat = None, [], None
+    idx._aadhar_to_meta = {}
+    return idx
+
+def _doc(aadhar, seed):
+    emb = np.random.default_rng(seed).standard_normal(512).astype(np.float32)
+    emb /= np.linalg.norm(emb)
+    return {"aadhar": aadhar, "name": aadhar, "embeddings": [emb.tobytes()]}
+
+def test_rebuild_does_not_resurrect_concurrent_delete():
+    """
+    Verifies a rebuild whose MongoDB snapshot predates a delete keeps the live
+    (tombstoned) index and schedules another rebuild instead of swapping.
+    """
+    idx = _indexer([_doc("A", 1), _doc("B", 2)])
+    idx.update_index()
+    assert len(idx._faiss_mapping) == 2
+    idx._dirty.clear()
+
+    idx._profiles_col.on_find = lambda: idx.delete_profile("A")
+    idx.update_index()
+
+    assert [m and m["aadhar"] for m in idx._faiss_mapping] == [None, "B"]
+    assert idx._dirty.is_set()
+    print("Stale snapshot discarded; delete kept and rebuild rescheduled.")
+
+    idx._dirty.clear()
+    idx.update_index()
+    assert [m["aadhar"] for m in idx._faiss_mapping] == ["B"]
+    assert idx._tombstones == 0
+    assert not idx._dirty.is_set()
+    print("Follow-up rebuild compacts the delete.")
+
+def test_rebuild_replays_concurrent_augment():
+    """
+    Verifies a pose added while the rebuild reads MongoDB is carried over to
+    the new index instead of discarding the rebuild (or losing the pose).
+    """
+    idx = _indexer([_doc("A", 1), _doc("B", 2)])
+    idx.update_index()
+    idx._dirty.clear()
+
+    pose = np.random.default_rng(3).standard_normal(512).astype(np.float32)
+    idx._profiles_col.on_find = lambda: idx.augment_identity("B", pose)
+    idx.update_index()
+
+    assert [m["aadhar"] for m in idx._faiss_mapping] == ["A", "B", "B"]
+    assert idx._faiss_index.ntotal == 3 and len(idx._flat_mat) == 3
+    assert idx._faiss_mapping[2] is idx._aadhar_to_meta["B"]
+    assert not idx._dirty.is_set()
+    print("Concurrent augment replayed onto the rebuilt index.")
+
+if __name__ == "__main__":
+    test_rebuild_does_not_resurrect_concurrent_delete()
+    test_rebuild_replays_concurrent_augment()
+    print("\nSUCCESS: Indexer rebuild race test passed.")
@@ -0,0 +1,34 @@
+import numpy as np
+from core.deep_sort import DeepSortTrack
+
+def _unit(v):
+    return (v / np.linalg.norm(v)).astype(np.float32)
+
+def test_miss_cache_tracks_similarity_and_version():
+    """
+    Verifies a track skips repeat FAISS lookups only while its embedding stays
+    close to the last miss and the index has not changed.
+    """
+    rng = np.random.default_rng(0)
+    emb = _unit(rng.standard_normal(512))
+    track = DeepSortTrack(1, np.array([100, 100, 200, 200]), face_embedding=emb)
+
+    assert not track.recognition_cached(0, 0.98)
+    track.mark_unrecognised(0)
+    assert track.recognition_cached(0, 0.98)
+    print("Repeat query against same index is cached.")
+
+    # Index mutated (enrol / rebuild) -> must re-query
+    assert not track.recognition_cached(1, 0.98)
+    print("Index version change invalidates cache.")
+
+    # Embedding drifts away (different person / new pose) -> must re-query
+    other = _unit(rng.standard_normal(512))
+    for _ in range(10):
+        track.update(np.array([100, 100, 200, 200]), face_embedding=other)
+    assert not track.recognition_cached(0, 0.98)
+    print("Embedding drift invalidates cache.")
+
+if __name__ == "__main__":
+    test_miss_cache_tracks_similarity_and_version()
+    print("\nSUCCESS: Recognition cache test passed.")
@@ -0,0 +1,37 @@
+import numpy as np
+from core.deep_sort import DeepSortTracker
+
+def test_appearance_matching_follows_embeddings():
+    """
+    Verifies confirmed tracks are re-associated by embedding even when the
+    detections jump far outside the spatial gates, and that detections
+    without an embedding fall through to new tracks.
+    """
+    rng = np.random.default_rng(0)
+    embs = rng.standard_normal((2, 512)).astype(np.float32)
+    embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+
+    tracker = DeepSortTracker()
+    first = [
+        {"bbox": np.array([0, 0, 50, 50]), "embedding": embs[0]},
+        {"bbox": np.array([1000, 0, 1050, 50]), "embedding": embs[1]},
+    ]
+    tracker.update(first)
+    tracker.update(first) # Second hit confirms both tracks
+    a_id, b_id = sorted(tracker.tracks.keys())
+
+    # Swap identities to far-away positions; add one embedding-less detection
+    tracker.update([
+        {"bbox": np.array([2000, 900, 2050, 950]), "embedding": embs[1]},
+        {"bbox": np.array([3000, 900, 3050, 950]), "embedding": embs[0]},
+        {"bbox": np.array([5000, 0, 5050, 50])},
+    ])
+
+    assert len(tracker.tracks) == 3
+    assert tracker.tracks[a_id].smoothed_bbox[0] == 3000
+    assert tracker.tracks[b_id].smoothed_bbox[0] == 2000
+    print("Appearance stage matched both tracks by embedding.")
+
+if __name__ == "__main__":
+    test_appearance_matching_follows_embeddings()
+    print("\nSUCCESS: Appearance matching test passed.")
@@ -0,0 +1,66 @@
+import numpy as np
+from core.deep_sort import DeepSortTracker, iou, iou_matrix
+
+def test_distance_gate_matches_only_in_range():
+    """
+    Verifies the centre-distance fallback matches in-range pairs and spawns
+    new tracks for detections with no track inside FACE_TRACK_MAX_DIST.
+    """
+    tracker = DeepSortTracker()
+
+    tracker.update([
+        {"bbox": np.array([100, 100, 200, 200])},
+        {"bbox": np.array([1000, 100, 1100, 200])},
+    ])
+    assert len(tracker.tracks) == 2
+    near_id, far_id = sorted(tracker.tracks.keys())
+
+    tracker.predict()
+    # Detection 0 is 200px from the first track, detection 1 is out of range of both
+    tracker.update([
+        {"bbox": np.array([300, 100, 400, 200])},
+        {"bbox": np.array([2000, 1000, 2100, 1100])},
+    ])
+
+    assert len(tracker.tracks) == 3
+    assert tracker.tracks[near_id].time_since_update == 0
+    assert tracker.tracks[far_id].time_since_update == 1
+    print("Distance gate matched in-range pair and spawned a new track.")
+
+def _box(cx, cy):
+    return {"bbox": np.array([cx - 1, cy - 1, cx + 1, cy + 1], dtype=float)}
+
+def test_distance_gate_prefers_feasible_assignment():
+    """
+    Verifies the assignment maximises in-range matches: pairing B with its
+    nearby detection is cheaper overall, but would strand track A.
+    """
+    tracker = DeepSortTracker()
+    tracker.update([_box(0, 0), _box(404, 0)])
+    a_id, b_id = sorted(tracker.tracks.keys())
+
+    # d1 is 399px from A and 5px from B; d2 is 401px (out of range) from A, 399px from B
+    tracker.update([_box(399, 0), _box(204, 345.23)])
+
+    assert len(tracker.tracks) == 2
+    assert tracker.tracks[a_id].time_since_update == 0
+    assert tracker.tracks[b_id].time_since_update == 0
+    print("Distance gate kept both tracks matched.")
+
+def test_iou_matrix_matches_scalar_iou():
+    """
+    Verifies the broadcast IoU matrix agrees with the scalar iou() helper.
+    """
+    rng = np.random.default_rng(1)
+    a = rng.uniform(0, 500, (6, 2)); a = np.hstack([a, a + rng.uniform(1, 200, (6, 2))])
+    b = rng.uniform(0, 500, (4, 2)); b = np.hstack([b, b + rng.uniform(1, 200, (4, 2))])
+
+    expected = np.array([[iou(x, y) for y in b] for x in a])
+    assert np.allclose(iou_matrix(a, b), expected)
+    print("Vectorized IoU matches scalar IoU.")
+
+if __name__ == "__main__":
+    test_distance_gate_matches_only_in_range()
+    test_distance_gate_prefers_feasible_assignment()
+    test_iou_matrix_matches_scalar_iou()
+    print("\nSUCCESS: Tracking matcher tests passed.")
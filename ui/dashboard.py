@@ -19,7 +19,7 @@ All business logic / UI components live in their respective modules:
 """
 
 import time
-import json
+import orjson
 import socket
 from datetime import datetime
 
@@ -44,7 +44,7 @@ from ui.views.ci_view                 import CIView
 # ────────────────────────────────────────────────────────────────────
 
 import core.watchdog_indexer as watchdog
-from core.state              import new_stream_signals, cache, cache_str, global_signals
+from core.state              import poll_new_streams, cache, cache_str, global_signals
 from components.video_worker import VideoProcessor
 from config import (
     WINDOW_WIDTH, WINDOW_HEIGHT,
@@ -81,6 +81,7 @@ class DashboardWindow(QMainWindow):
 
         # Session state
         self.active_sessions:   dict = {}
+        self._stream_cursor = None   # Position in the camera-up event stream (None: start at the end)
         self.active_intel_cards: dict = {}
         self.intel_last_seen:   dict = {}
 
@@ -328,10 +329,18 @@ class DashboardWindow(QMainWindow):
     # ------------------------------------------------------------------
 
     def check_for_new_streams(self):
-        while new_stream_signals:
-            cid = new_stream_signals.popleft()
+        self._stream_cursor, new_ids = poll_new_streams(self._stream_cursor)
+        for cid in new_ids:
             if cid not in self.active_sessions:
                 self._start_session(cid)
+        self._sync_stream_visibility()
+
+    def _sync_stream_visibility(self):
+        """Let workers skip rendering for cards that cannot be seen."""
+        minimized = self.isMinimized()
+        for session in self.active_sessions.values():
+            label = session["card"].video_label
+            session["worker"].set_visible(label.isVisible() and not minimized)
 
     def _start_session(self, client_id: str):
         card = CameraCard(client_id)
@@ -405,7 +414,7 @@ class DashboardWindow(QMainWindow):
         msg = self.pubsub.get_message()
         if msg:
             try:
-                alert = json.loads(msg["data"].decode("utf-8"))
+                alert = orjson.loads(msg["data"])
                 if alert.get("type") == "SECURITY_ALERT":
                     self.alert_label.setText(alert["message"])
                     self.alert_banner.show()
@@ -132,7 +132,8 @@ class ActivityReportDialog(QMainWindow):
             rl.setContentsMargins(8, 0, 8, 0); rl.setSpacing(10)
             locs = log.get("locations", ["Unknown", "Unknown"])
             
-            l1 = QLabel(log.get("date_str", "?"))
+            ts = log.get("timestamp")
+            l1 = QLabel(ts.strftime("%Y-%m-%d %H:%M:%S") if ts else log.get("date_str", "?"))
             l1.setObjectName("LogTime")
             l1.setFixedWidth(60)
             
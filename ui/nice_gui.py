@@ -1,5 +1,5 @@
 import os
-import json
+import orjson
 import time
 import asyncio
 import tempfile
@@ -18,7 +18,7 @@ from fastapi.responses import StreamingResponse
 from nicegui import ui, app
 
 # Ryuk AI Imports
-from core.state import cache, new_stream_signals
+from core.state import cache, poll_new_streams
 from core.database import get_sync_db, init_db
 from core.server import app as streaming_app, server as ws_server
 from core.watchdog_indexer import (
@@ -64,6 +64,7 @@ class NiceDashboard:
         self.profile_refresh_cache: Dict[str, float] = {} # aadhar -> last_db_refresh_time
         self.intel_start_times: Dict[str, float] = {} # aadhar -> session_start_time
         self.intel_elements: Dict[str, IntelPanelItem] = {} 
+        self._stream_cursor = None # Position in the camera-up event stream (None: start at the end)
         
         self.redis_healthy = False
         self.mongo_healthy = False
@@ -349,8 +350,8 @@ class NiceDashboard:
 
 
     async def _check_new_streams(self):
-        while new_stream_signals:
-            cid = new_stream_signals.popleft()
+        self._stream_cursor, new_ids = await asyncio.to_thread(poll_new_streams, self._stream_cursor)
+        for cid in new_ids:
             if cid not in active_sessions:
                 print(f"DEBUG: Starting session for {cid}")
                 proc = Processor(cid)
@@ -524,7 +525,7 @@ class NiceDashboard:
             while not app.is_stopping:
                 msg = await asyncio.to_thread(pubsub.get_message, ignore_subscribe_messages=True, timeout=1.0)
                 if msg:
-                    data = json.loads(msg['data'])
+                    data = orjson.loads(msg['data'])
                     # 1. Update the sidebar Intel panel
                     self.ui_queue.put(lambda d=data: self._update_intel(d))
                     # 2. Dispatch a browser notification
@@ -665,20 +666,14 @@ class NiceDashboard:
 
     async def _generate_intel_dossier(self, aadhar: str, container: ui.markdown):
         container.set_content("Initializing core reasoning models...")
-        profile = get_profile(aadhar) or {"name": "Unknown", "aadhar": aadhar}
-        logs = get_activity_report(aadhar, limit=100)
-        
         full_text = ""
-        async for chunk in asyncio.to_thread(lambda: ryuk_agent.generate_dossier_stream(profile, logs, "LAST 24 HOURS")):
-            # Note: generate_dossier_stream is a generator, we wrap it in to_thread if it's blocking
-            # But wait, it's a generator. NiceGUI handles async loops.
-            # However, RyukAgent.generate_dossier_stream is synchronous generator (yield).
-            # I should iterate in thread or make it async.
-            pass
-        
-        # Let's fix the iteration for synchronous generator in async context
+
+        # Mongo reads, payload serialisation and the Gemini stream all run in
+        # one worker thread so a large dossier never blocks the event loop.
         def iterate():
             nonlocal full_text
+            profile = get_profile(aadhar) or {"name": "Unknown", "aadhar": aadhar}
+            logs = get_activity_report(aadhar, limit=100)
             for chunk in ryuk_agent.generate_dossier_stream(profile, logs, "LAST 24 HOURS"):
                 full_text += chunk
                 container.set_content(full_text)